@@ -1,23 +1,71 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
+from django.db import connections
+from accounts import tenants
 from accounts.models import GymDetails
-from django.conf import settings
+from accounts.tenant_migrations import init_worker, migrate_tenant
+
 
 class Command(BaseCommand):
     """
     Management command to initialize databases for all gyms and apply migrations
     """
-    help = 'Initialize databases for all gyms and apply migrations'
+    help = (
+        'Initialize databases for all gyms and apply migrations, several gyms at a time. '
+        'Up-to-date gyms are skipped, so an interrupted run can simply be started again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only process this gym database alias, e.g. mygym_db')
+        parser.add_argument('--workers', type=int, default=4, help='Number of gyms migrated concurrently, each in its own process')
 
-    def handle(self, *args, **kwargs):
-        for gym in GymDetails.objects.all():
-            db_name = f'{gym.db_name}_db'
-            if db_name in settings.DATABASES:
-                # Apply all migrations for the new database
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        started = time.perf_counter()
+        counts = {}
+        for index, (db_name, outcome, applied, error) in enumerate(self.migrate(db_names, options['workers']), 1):
+            counts[outcome] = counts.get(outcome, 0) + 1
+            progress = f'[{index}/{len(db_names)}]'
+            if outcome == 'migrated':
+                self.stdout.write(self.style.SUCCESS(f'{progress} Successfully applied {applied} migration(s) for database: {db_name}'))
+            elif outcome == 'current':
+                self.stdout.write(f'{progress} Migrations already applied for database: {db_name}')
+            elif outcome == 'locked':
+                self.stdout.write(self.style.WARNING(f'{progress} Database {db_name} is being migrated by another process, skipped'))
+            elif outcome == 'missing':
+                self.stdout.write(self.style.ERROR(f'{progress} Database connection {db_name} not found'))
+            else:
+                self.stdout.write(self.style.ERROR(f'{progress} Error applying migrations for database {db_name}: {error}'))
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(counts.items())) or 'no gyms'
+        elapsed = time.perf_counter() - started
+        style = self.style.ERROR if counts.get('failed') or counts.get('missing') else self.style.SUCCESS
+        self.stdout.write(style(f'Processed {len(db_names)} database(s) in {elapsed:.2f}s: {summary}'))
+
+    def migrate(self, db_names, workers):
+        """
+        Migrate gym databases, yielding each result as soon as it is known.
+        """
+        if workers <= 1 or len(db_names) <= 1:
+            for db_name in db_names:
+                yield migrate_tenant(db_name)
+            return
+
+        # Workers are spawned rather than forked, so no connection of this
+        # process is shared with them.
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as executor:
+            futures = {executor.submit(migrate_tenant, db_name): db_name for db_name in db_names}
+            for future in as_completed(futures):
                 try:
-                    call_command('migrate', database=db_name, app_label='management', verbosity=0)
-                    self.stdout.write(self.style.SUCCESS(f'Successfully applied migrations for database: {db_name}'))
+                    yield future.result()
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'Error applying migrations for database {db_name}: {e}'))
-            else:
-                self.stdout.write(self.style.ERROR(f'Database connection {db_name} not found'))
+                    yield futures[future], 'failed', 0, str(e)
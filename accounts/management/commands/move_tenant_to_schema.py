@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from accounts import tenants
+from accounts.models import GymDetails
+from accounts.tenant_migrations import move_to_schema
+
+
+class Command(BaseCommand):
+    """
+    Management command to move gym databases into schemas of the shared
+    database, ahead of switching TENANT_MODE to schema
+    """
+    help = (
+        'Copy gym databases into their schema of TENANT_SCHEMA_DATABASE. '
+        'Run it while the gyms receive no writes, then set TENANT_MODE=schema.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only move this gym database alias, e.g. mygym_db')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        for db_name in db_names:
+            try:
+                counts = move_to_schema(db_name)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error moving database {db_name} into its schema: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Moved {sum(counts.values())} rows of database {db_name} into its schema'))
+            for label, count in counts.items():
+                self.stdout.write(f'  {label}: {count}')
@@ -0,0 +1,58 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import tenants
+
+
+class TenantMiddleware:
+    """
+    Middleware attaching the gym database of the authenticated user to the request
+
+    The user is read from the JWT access token, whose signature is checked
+    without touching the database, or from the session. Their gym comes from
+    the cache of gym admins shared by every worker, which the account
+    signals keep up to date; the ``db_name`` claim of the token only tells
+    which gym the user had when logging in, so it is not trusted. The alias is stored as
+    ``request.tenant`` and in ``tenants.current_tenant`` for the database
+    router.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.authentication = JWTAuthentication()
+
+    def __call__(self, request):
+        request.tenant = self.get_tenant(request)
+        reset = tenants.current_tenant.set(request.tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            tenants.current_tenant.reset(reset)
+
+    def get_tenant(self, request):
+        """
+        Resolve the gym database of the user making a request
+
+        Args:
+            request: The request object
+
+        Returns:
+            str: The gym database alias, or None if it cannot be resolved
+        """
+        header = self.authentication.get_header(request)
+        if header is not None:
+            raw_token = self.authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            try:
+                token = self.authentication.get_validated_token(raw_token)
+            except InvalidToken:
+                # The view's authentication rejects the request.
+                return None
+            user_id = token.get(api_settings.USER_ID_CLAIM)
+            return tenants.get_user_alias(user_id) if user_id is not None else None
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return tenants.get_user_alias(user.pk)
+        return None
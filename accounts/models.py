@@ -6,8 +6,9 @@ from django.db import connections, OperationalError
 from django.core.management import call_command
 from django.conf import settings
 import os
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import psycopg
+
+from .tenants import get_alias, register
 
 logger = logging.getLogger(__name__)
 
@@ -101,50 +102,39 @@ class GymDetails(models.Model):
 
 def create_gym_database(db_name):
     """
-    Function to create a new database for a gym
+    Function to create a new database for a gym, or its schema in schema mode
 
     Args:
         db_name (str): The name of the gym's database
     """
-    db_name = f'{db_name}_db'
-
-    # Establish a connection to the default PostgreSQL database
-    conn = psycopg2.connect(
-        dbname=os.environ.get('DATABASE_NAME'),
-        user=os.environ.get('DATABASE_USER_NAME'),
-        password=os.environ.get('DATABASE_PASSWORD'),
-        host=os.environ.get('DATABASE_HOST'),
-        port=os.environ.get('DATABASE_PORT')
-    )
-    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-    cursor = conn.cursor()
-
-    # Create the new database if it does not exist
-    cursor.execute(f"SELECT 1 FROM pg_catalog.pg_database WHERE datname = '{db_name}'")
-    exists = cursor.fetchone()
-    if not exists:
-        cursor.execute(f'CREATE DATABASE {db_name}')
-    
-    cursor.close()
-    conn.close()
-    settings.DATABASES[db_name] = {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': f'{db_name}',
-        'USER': os.environ.get('DATABASE_USER_NAME'),
-        'PASSWORD': os.environ.get('DATABASE_PASSWORD'),
-        'HOST': os.environ.get('DATABASE_HOST'),
-        'PORT': os.environ.get('DATABASE_PORT'),
-        'TIME_ZONE': settings.TIME_ZONE,
-        'USE_TZ': settings.USE_TZ,
-        'CONN_HEALTH_CHECKS': False,
-        'CONN_MAX_AGE': 0,
-        'OPTIONS': {},
-        'AUTOCOMMIT': True,
-        'ATOMIC_REQUESTS': False, 
-    }
+    db_name = get_alias(db_name)
+
+    if settings.TENANT_MODE != 'schema':
+        # Establish a connection to the default PostgreSQL database
+        conn = psycopg.connect(
+            dbname=os.environ.get('DATABASE_NAME'),
+            user=os.environ.get('DATABASE_USER_NAME'),
+            password=os.environ.get('DATABASE_PASSWORD'),
+            host=os.environ.get('DATABASE_HOST'),
+            port=os.environ.get('DATABASE_PORT'),
+            autocommit=True,
+        )
+        cursor = conn.cursor()
+
+        # Create the new database if it does not exist
+        cursor.execute("SELECT 1 FROM pg_catalog.pg_database WHERE datname = %s", [db_name])
+        exists = cursor.fetchone()
+        if not exists:
+            cursor.execute(f'CREATE DATABASE {db_name}')
+
+        cursor.close()
+        conn.close()
+    register(db_name)
     connection = connections[db_name]
     try:
+        if settings.TENANT_MODE == 'schema':
+            connection.create_schema()
         connection.ensure_connection()
         call_command('migrate', database=db_name, app_label='management', verbosity=0)
     except OperationalError:
-        pass
\ No newline at end of file
+        pass
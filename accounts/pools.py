@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# Gym databases whose pool may be open in this process, least recently used
+# first, with the time of their last use.
+_pools = OrderedDict()
+_lock = threading.Lock()
+_evictions = 0
+
+
+def pool_options(alias):
+    """
+    Build the psycopg pool options of a gym database, used as ``OPTIONS['pool']``.
+
+    Pools start empty, open a connection per concurrent request up to
+    ``TENANT_POOL_MAX_SIZE`` and close connections idle for
+    ``TENANT_POOL_MAX_IDLE`` seconds, so a quiet gym holds no connection.
+    """
+    return {
+        'name': alias,
+        'min_size': 0,
+        'max_size': settings.TENANT_POOL_MAX_SIZE,
+        'max_idle': settings.TENANT_POOL_MAX_IDLE,
+        'timeout': settings.TENANT_POOL_TIMEOUT,
+        'num_workers': 1,
+    }
+
+
+def shared_pool_options():
+    """
+    Build the options of the pool all gyms share in schema mode.
+    """
+    return {
+        'name': 'tenant_schemas',
+        'min_size': 1,
+        'max_size': settings.TENANT_MAX_CONNECTIONS,
+        'max_idle': settings.TENANT_POOL_MAX_IDLE,
+        'timeout': settings.TENANT_POOL_TIMEOUT,
+    }
+
+
+def max_pools():
+    """
+    Get the number of pools that can be open at once without exceeding ``TENANT_MAX_CONNECTIONS``.
+    """
+    return max(settings.TENANT_MAX_CONNECTIONS // settings.TENANT_POOL_MAX_SIZE, 1)
+
+
+def get_pool(alias):
+    """
+    Get the psycopg pool Django opened for a gym database, if any.
+    """
+    from django.db.backends.postgresql.base import DatabaseWrapper
+
+    return DatabaseWrapper._connection_pools.get(alias)
+
+
+def close(alias):
+    """
+    Close the pool of a gym database.
+
+    Connections in use are closed when they are given back; the next request
+    to the gym opens a new pool.
+    """
+    from django.db.backends.postgresql.base import DatabaseWrapper
+
+    with _lock:
+        _pools.pop(alias, None)
+    pool = DatabaseWrapper._connection_pools.pop(alias, None)
+    if pool is not None:
+        pool.close()
+
+
+def touch(alias):
+    """
+    Record a use of a gym database and close the pools that should not stay open.
+
+    Pools unused for ``TENANT_POOL_IDLE_TTL`` seconds are closed, then the
+    least recently used ones until at most ``max_pools()`` remain. Pools are
+    kept in order of last use, so only the evicted ones are looked at.
+    """
+    global _evictions
+    if settings.TENANT_MODE == 'schema':
+        # Every gym draws from the same pool, which is never evicted.
+        return
+    now = time.monotonic()
+    evicted = []
+    with _lock:
+        _pools[alias] = now
+        _pools.move_to_end(alias)
+        limit = max_pools()
+        while len(_pools) > 1:
+            oldest, used = next(iter(_pools.items()))
+            if len(_pools) <= limit and now - used <= settings.TENANT_POOL_IDLE_TTL:
+                break
+            _pools.popitem(last=False)
+            evicted.append(oldest)
+        _evictions += len(evicted)
+    for oldest in evicted:
+        close(oldest)
+
+
+def stats():
+    """
+    Get the state of the gym database pools of this process.
+
+    Returns:
+        dict: Global limits and counters, and the psycopg statistics of each
+        open pool, or of the shared pool in schema mode
+    """
+    if settings.TENANT_MODE == 'schema':
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        shared = [pool for key, pool in DatabaseWrapper._connection_pools.items() if isinstance(key, tuple) and key[0] == 'tenant_schema']
+        return {
+            'mode': settings.TENANT_MODE,
+            'max_connections': settings.TENANT_MAX_CONNECTIONS,
+            'open_pools': len(shared),
+            'connections': sum(pool.get_stats().get('pool_size', 0) for pool in shared),
+            'pools': {pool.name: pool.get_stats() for pool in shared},
+        }
+
+    now = time.monotonic()
+    with _lock:
+        used = list(_pools.items())
+        evictions = _evictions
+    tenants = {}
+    for alias, last_used in reversed(used):
+        pool = get_pool(alias)
+        tenants[alias] = {
+            'idle_seconds': round(now - last_used, 1),
+            **(pool.get_stats() if pool is not None else {}),
+        }
+    return {
+        'mode': settings.TENANT_MODE,
+        'max_connections': settings.TENANT_MAX_CONNECTIONS,
+        'max_pools': max_pools(),
+        'open_pools': sum(1 for alias in tenants if get_pool(alias) is not None),
+        'connections': sum(pool.get('pool_size', 0) for pool in tenants.values()),
+        'evictions': evictions,
+        'pools': tenants,
+    }
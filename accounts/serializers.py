@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from . import tenants
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer for obtaining JWT tokens carrying the gym database of the user
+
+    The ``db_name`` claim tells clients which gym the user administered when
+    logging in; refreshed access tokens copy it from the refresh token. The
+    server does not trust it: accounts.middleware.TenantMiddleware looks the
+    gym up from the user id.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        alias = tenants.get_user_alias(user.pk)
+        if alias:
+            token['db_name'] = alias
+        return token
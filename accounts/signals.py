@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import tenants
+from .models import GymDetails
+
+
+@receiver(pre_save, sender=GymDetails)
+def remember_db_name(sender, instance, **kwargs):
+    """
+    Keep the stored database name and admin of a gym, to notice when they change.
+    """
+    previous = (
+        GymDetails.objects.filter(pk=instance.pk).values_list('db_name', 'admin_id').first()
+        if instance.pk else None
+    )
+    instance._previous_db_name, instance._previous_admin_id = previous or (None, None)
+
+
+@receiver(post_save, sender=GymDetails)
+def forget_renamed_database(sender, instance, **kwargs):
+    """
+    Stop resolving the previous alias of a renamed gym, and the cached gym of
+    its previous and new admin, once the change commits.
+    """
+    previous = getattr(instance, '_previous_db_name', None)
+    if previous and previous != instance.db_name:
+        alias = tenants.get_alias(previous)
+        transaction.on_commit(lambda: tenants.forget(alias))
+    admins = {instance.admin_id, getattr(instance, '_previous_admin_id', None)} - {None}
+    transaction.on_commit(lambda: tenants.forget_admins(admins))
+
+
+@receiver(post_delete, sender=GymDetails)
+def forget_deleted_database(sender, instance, **kwargs):
+    """
+    Stop resolving the alias of a deleted gym, and the cached gym of its
+    admin, once the delete commits.
+    """
+    alias = tenants.get_alias(instance.db_name)
+    admin_id = instance.admin_id
+    transaction.on_commit(lambda: tenants.forget(alias))
+    transaction.on_commit(lambda: tenants.forget_admins([admin_id]))
@@ -0,0 +1,142 @@
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from . import tenants
+
+
+# Migrations of the same gym are never run by two processes at once: a
+# session-level advisory lock is held for the whole migration. Its key pairs
+# this constant with a hash of the alias, since in schema mode every gym
+# lives in the same database.
+MIGRATION_LOCK_ID = 0x67796d6d
+
+
+def init_worker():
+    """
+    Set Django up in a worker process; each worker opens its own connections.
+    """
+    django.setup()
+
+
+def migrate_tenant(db_name):
+    """
+    Apply the pending migrations of one gym database.
+
+    The recorded migrations are read first, and nothing else is done when
+    none is pending. Every migration is recorded as soon as it is applied, so
+    a run interrupted half-way resumes from the first unapplied one.
+
+    Args:
+        db_name (str): The gym database alias
+
+    Returns:
+        tuple: ``(db_name, status, applied migrations, error message)``, with
+        status one of ``migrated``, ``current``, ``locked``, ``missing`` or ``failed``
+    """
+    try:
+        if not tenants.resolve(db_name):
+            return db_name, 'missing', 0, None
+        connection = connections[db_name]
+        locked = connection.vendor == 'postgresql'
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", [MIGRATION_LOCK_ID, db_name])
+                if not cursor.fetchone()[0]:
+                    return db_name, 'locked', 0, None
+        try:
+            plan = pending_migrations(connection)
+            if not plan:
+                return db_name, 'current', 0, None
+            call_command('migrate', database=db_name, app_label='management', verbosity=0)
+            return db_name, 'migrated', len(plan), None
+        finally:
+            if locked:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", [MIGRATION_LOCK_ID, db_name])
+    except Exception as e:
+        return db_name, 'failed', 0, str(e)
+    finally:
+        connections.close_all()
+
+
+def pending_migrations(connection):
+    """
+    Get the migrations of the ``management`` app not yet applied to a database.
+    """
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes('management'))
+
+
+def copy_table(source, target, model):
+    """
+    Stream the rows of a model table from one connection to another with binary ``COPY``.
+
+    Returns:
+        int: The number of rows copied
+    """
+    quote = target.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    with source.cursor() as source_cursor, target.cursor() as target_cursor:
+        with target_cursor.copy(f"COPY {table} ({columns}) FROM STDIN (FORMAT binary)") as copy_in:
+            with source_cursor.copy(f"COPY (SELECT {columns} FROM {table}) TO STDOUT (FORMAT binary)") as copy_out:
+                for block in copy_out:
+                    copy_in.write(block)
+        return target_cursor.rowcount
+
+
+def move_to_schema(db_name):
+    """
+    Copy a gym database into its schema of ``TENANT_SCHEMA_DATABASE``.
+
+    The schema is created and migrated, then every ``management`` table is
+    streamed from a single snapshot of the gym database and the id
+    sequences are moved past the copied ids. The copy runs in one
+    transaction, so a failed move leaves empty tables and can be run again.
+    The gym database itself is left untouched; writes made to it during the
+    move are not copied. A partitioned MemberEntry table is copied into a
+    plain one, which ``partition_entries`` can partition again.
+
+    Args:
+        db_name (str): The gym database alias, also the name of its schema
+
+    Returns:
+        dict: The number of rows copied, keyed by model label
+
+    Raises:
+        ValueError: If the gym database has unapplied migrations or the schema already holds rows
+    """
+    source_alias = f'{db_name}__database'
+    target_alias = f'{db_name}__schema'
+    settings.DATABASES[source_alias] = tenants.database_config(db_name, 'database')
+    settings.DATABASES[target_alias] = tenants.database_config(db_name, 'schema')
+    source, target = connections[source_alias], connections[target_alias]
+    models = list(apps.get_app_config('management').get_models(include_auto_created=True))
+    try:
+        if pending_migrations(source):
+            raise ValueError(f'Database {db_name} has unapplied migrations; run init_gym first')
+        target.create_schema()
+        call_command('migrate', database=target_alias, app_label='management', verbosity=0)
+
+        with transaction.atomic(using=source_alias), transaction.atomic(using=target_alias):
+            with source.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            for model in models:
+                if model._base_manager.using(target_alias).exists():
+                    raise ValueError(f'Schema {db_name} already holds {model._meta.label} rows')
+            counts = {model._meta.label: copy_table(source, target, model) for model in models}
+            with target.cursor() as cursor:
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+        return counts
+    finally:
+        for alias in (source_alias, target_alias):
+            connections[alias].close()
+            connections[alias].close_pool()
+            del connections[alias]
+            settings.DATABASES.pop(alias, None)
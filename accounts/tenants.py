@@ -0,0 +1,215 @@
+import contextvars
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.exceptions import NotFound, PermissionDenied
+
+from gym.caching import LRUCache
+
+from . import pools
+
+
+# Gym databases are registered on first use instead of at startup, so a worker
+# boots in constant time whatever the number of gyms. Known aliases are
+# re-checked against GymDetails once they are older than TENANT_CACHE_TTL
+# seconds; unknown ones are remembered for TENANT_MISS_TTL seconds.
+_found = LRUCache(settings.TENANT_CACHE_SIZE, settings.TENANT_CACHE_TTL)
+_missing = LRUCache(settings.TENANT_CACHE_SIZE, settings.TENANT_MISS_TTL)
+
+# Gym database of the request being handled, set by accounts.middleware.
+current_tenant = contextvars.ContextVar('current_tenant', default=None)
+
+# Aliases added to settings.DATABASES by the registry, as opposed to the ones
+# configured in the settings module.
+_registered = set()
+
+
+def get_alias(db_name):
+    """
+    Get the database alias of a gym from its ``GymDetails.db_name``.
+    """
+    return f'{db_name}_db'
+
+
+def database_config(alias, mode=None):
+    """
+    Build the connection settings of a gym database.
+
+    In database mode the alias names a PostgreSQL database, with connections
+    from a per-gym psycopg pool (see ``accounts.pools``). In schema mode it
+    names a schema of ``TENANT_SCHEMA_DATABASE``, and every gym shares one
+    pool. Connections are checked before being handed out.
+
+    Args:
+        alias (str): The database alias, also used as the PostgreSQL database or schema name
+        mode (str): ``database`` or ``schema``, defaults to ``TENANT_MODE``
+
+    Returns:
+        dict: The entry to store in ``settings.DATABASES``
+    """
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': alias,
+        'USER': os.environ.get('DATABASE_USER_NAME'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD'),
+        'HOST': os.environ.get('DATABASE_HOST'),
+        'PORT': os.environ.get('DATABASE_PORT'),
+        'TIME_ZONE': settings.TIME_ZONE,
+        'USE_TZ': settings.USE_TZ,
+        'CONN_HEALTH_CHECKS': True,
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': pools.pool_options(alias)},
+        'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False,
+        'TEST': {},
+    }
+    if (mode or settings.TENANT_MODE) == 'schema':
+        config.update({
+            'ENGINE': 'gym.backends.tenant_schema',
+            'NAME': settings.TENANT_SCHEMA_DATABASE,
+            'SCHEMA': alias,
+            'OPTIONS': {'pool': pools.shared_pool_options()},
+        })
+    return config
+
+
+def register(alias):
+    """
+    Add the connection settings of a gym database and mark it as known.
+    """
+    # django.db.connections reads its settings from this same dictionary.
+    settings.DATABASES.setdefault(alias, database_config(alias))
+    _registered.add(alias)
+    _missing.delete_many([alias])
+    _found.set(alias, True)
+
+
+def unregister(alias):
+    """
+    Remove the connection settings of a gym database registered by this module.
+
+    The connection of the current thread and the pool of the alias are
+    closed; connections that other threads are using are closed when they are
+    given back.
+    """
+    if alias not in _registered:
+        return
+    for connection in connections.all(initialized_only=True):
+        if connection.alias == alias:
+            connection.close()
+            del connections[alias]
+    pools.close(alias)
+    settings.DATABASES.pop(alias, None)
+    _registered.discard(alias)
+
+
+def gym_exists(alias):
+    """
+    Check in the default database whether a gym uses this alias.
+    """
+    from .models import GymDetails
+
+    if not alias.endswith('_db'):
+        return False
+    return GymDetails.objects.filter(db_name=alias[:-len('_db')]).exists()
+
+
+def resolve(alias):
+    """
+    Check whether an alias names a gym database, registering it on first use.
+
+    Aliases configured in the settings module are always accepted, except the
+    default database which never holds gym data. Other aliases are looked up
+    in GymDetails, at most once per cache lifetime.
+
+    Args:
+        alias (str): The database alias, e.g. ``mygym_db``
+
+    Returns:
+        bool: Whether queries can be sent to ``alias``
+    """
+    if not alias or alias == DEFAULT_DB_ALIAS:
+        return False
+    if alias in settings.DATABASES and alias not in _registered:
+        return True
+    if _found.get(alias):
+        pools.touch(alias)
+        return True
+    if _missing.get(alias):
+        return False
+    if gym_exists(alias):
+        register(alias)
+        pools.touch(alias)
+        return True
+    unregister(alias)
+    _missing.set(alias, True)
+    return False
+
+
+def forget(alias):
+    """
+    Drop what is known about an alias, so the next use looks it up again.
+    """
+    _found.delete_many([alias])
+    _missing.delete_many([alias])
+    unregister(alias)
+
+
+def admin_key(user_id):
+    """
+    Get the cache key holding the alias of the gym a user administers.
+    """
+    return f'tenant_admin:{user_id}'
+
+
+def get_user_alias(user_id):
+    """
+    Get the alias of the gym a user administers, looked up at most once per cache lifetime.
+
+    The answer decides which gym a user may reach, so it is kept in the
+    shared Django cache: once ``forget_admins`` drops it, every worker looks
+    it up again. Users without a gym are cached as ''.
+
+    Returns:
+        str: The alias, or None if the user administers no gym
+    """
+    from .models import GymDetails
+
+    alias = cache.get(admin_key(user_id))
+    if alias is None:
+        db_name = GymDetails.objects.filter(admin_id=user_id).order_by('id').values_list('db_name', flat=True).first()
+        alias = get_alias(db_name) if db_name else ''
+        cache.set(admin_key(user_id), alias, timeout=settings.TENANT_CACHE_TTL)
+    return alias or None
+
+
+def forget_admins(user_ids):
+    """
+    Drop the cached gyms of some users in every worker, so their next request looks them up again.
+    """
+    cache.delete_many([admin_key(user_id) for user_id in user_ids])
+
+
+def get_db_name(request):
+    """
+    Get the gym database a request targets.
+
+    This is the gym of the authenticated user, resolved by
+    ``accounts.middleware.TenantMiddleware``. Only staff users may target
+    another gym, with the ``db_name`` query parameter.
+
+    Raises:
+        PermissionDenied: If the user administers no gym and is not staff
+        NotFound: If no gym database can be resolved for the request
+    """
+    alias = getattr(request, 'tenant', None)
+    requested = request.query_params.get('db_name')
+    if requested and request.user.is_staff:
+        alias = requested
+    elif alias is None:
+        raise PermissionDenied('You do not administer a gym.')
+    if not resolve(alias):
+        raise NotFound(f'Unknown gym database: {alias}')
+    return alias
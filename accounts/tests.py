@@ -1,3 +1,78 @@
-from django.test import TestCase
+import unittest
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import SimpleTestCase, TestCase
+
+from . import tenants
+from .models import GymDetails, User
+
+
+class AdminCacheTests(TestCase):
+    """
+    The gym of each admin is cached in the shared cache, so dropping it reaches every worker.
+    """
+    databases = {'default'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='admin@example.com', password='secret', name='Admin')
+        # bulk_create skips GymDetails.save, which would create the gym database.
+        self.gym, = GymDetails.objects.bulk_create([GymDetails(name='Gym', db_name='cachedgym', admin=self.user)])
+        self.addCleanup(tenants.forget_admins, [self.user.pk])
+
+    def test_admin_gym_is_kept_in_the_shared_cache(self):
+        self.assertEqual(tenants.get_user_alias(self.user.pk), 'cachedgym_db')
+        self.assertEqual(cache.get(tenants.admin_key(self.user.pk)), 'cachedgym_db')
+
+        GymDetails.objects.filter(pk=self.gym.pk).delete()
+        self.assertEqual(tenants.get_user_alias(self.user.pk), 'cachedgym_db')
+
+        tenants.forget_admins([self.user.pk])
+        self.assertIsNone(tenants.get_user_alias(self.user.pk))
+        self.assertEqual(cache.get(tenants.admin_key(self.user.pk)), '')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Gym schemas need PostgreSQL.')
+class SchemaTenantTests(SimpleTestCase):
+    """
+    Gyms sharing a database in schema mode must each get their own tables and migration history.
+    """
+    databases = {'default'}
+    aliases = ('schemagym1_db', 'schemagym2_db')
+
+    def setUp(self):
+        for alias in self.aliases:
+            settings.DATABASES[alias] = {
+                **tenants.database_config(alias, 'schema'),
+                **{key: connection.settings_dict[key] for key in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')},
+            }
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            for alias in self.aliases:
+                cursor.execute(f'DROP SCHEMA IF EXISTS {connection.ops.quote_name(alias)} CASCADE')
+        for alias in self.aliases:
+            connections[alias].close()
+        for alias in self.aliases:
+            connections[alias].close_pool()
+            del connections[alias]
+            settings.DATABASES.pop(alias)
+
+    def test_each_gym_gets_its_own_tables_and_migrations(self):
+        for alias in self.aliases:
+            connections[alias].create_schema()
+            call_command('migrate', database=alias, app_label='management', verbosity=0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT table_schema FROM information_schema.tables WHERE table_name = %s ORDER BY table_schema",
+                ['management_member'],
+            )
+            self.assertEqual([row[0] for row in cursor.fetchall()], sorted(self.aliases))
+
+        for alias in self.aliases:
+            self.assertIn(('management', '0001_initial'), MigrationRecorder(connections[alias]).applied_migrations())
+        self.assertFalse(MigrationRecorder(connection).migration_qs.filter(app='management').exists())
@@ -1,9 +1,11 @@
 from django.contrib.auth import logout
 from rest_framework.views import APIView
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
+from . import pools
+
 
 class LogoutAPIView(APIView):
     """
@@ -23,4 +25,22 @@ class LogoutAPIView(APIView):
         """
         logout(request)  
         response = Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
-        return response
\ No newline at end of file
+        return response
+
+class TenantPoolStatsView(APIView):
+    """
+    API view for the connection pools of the gym databases in this worker
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Handle GET request for the connection pool statistics
+
+        Args:
+            request: The request object
+
+        Returns:
+            Response: The global limits and the statistics of each open pool
+        """
+        return Response({"data": pools.stats()}, status=status.HTTP_200_OK)
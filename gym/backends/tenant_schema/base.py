@@ -0,0 +1,96 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+from .introspection import DatabaseIntrospection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend keeping the tables of a gym in a schema of a shared database.
+
+    Every gym alias using this backend points at the same database and names
+    its schema in ``settings_dict['SCHEMA']``. The ``search_path`` is set to
+    that schema, then ``public`` for the extensions the gyms share, each time
+    a connection is taken, and every alias draws from
+    one pool shared by all the aliases of the same database, so the number of
+    connections does not grow with the number of gyms. Introspection only
+    sees the gym schema, so each gym records its migrations in its own
+    ``django_migrations`` table even though ``public`` has one.
+    """
+    introspection_class = DatabaseIntrospection
+
+    # Installed once in public for every gym, see create_schema.
+    shared_extensions = ('pg_trgm',)
+
+    @property
+    def schema_name(self):
+        schema = self.settings_dict.get('SCHEMA')
+        if not schema:
+            raise ImproperlyConfigured(f"Database '{self.alias}' has no SCHEMA to set as its search_path.")
+        return schema
+
+    @property
+    def pool_key(self):
+        """
+        Key of the pool shared by every schema of the database.
+        """
+        return ('tenant_schema', self.settings_dict['HOST'], self.settings_dict['PORT'], self.settings_dict['NAME'])
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if not pool_options:
+            return None
+        if self.pool_key not in self._connection_pools:
+            if self.settings_dict.get('CONN_MAX_AGE', 0) != 0:
+                raise ImproperlyConfigured("Pooling doesn't support persistent connections.")
+            from psycopg_pool import ConnectionPool
+
+            connect_kwargs = self.get_connection_params()
+            connect_kwargs['autocommit'] = True
+            pool = ConnectionPool(
+                kwargs=connect_kwargs,
+                open=False,
+                configure=self._configure_connection,
+                check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                **({} if pool_options is True else pool_options),
+            )
+            self._connection_pools.setdefault(self.pool_key, pool)
+        return self._connection_pools[self.pool_key]
+
+    def close_pool(self):
+        pool = self._connection_pools.pop(self.pool_key, None)
+        if pool is not None:
+            pool.close()
+
+    def init_connection_state(self):
+        super().init_connection_state()
+        # Pooled connections were last used by any gym, so the schema is set
+        # on every checkout, not only when the connection is opened.
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SET search_path TO {self.ops.quote_name(self.schema_name)}, public')
+        if not self.get_autocommit():
+            self.connection.commit()
+
+    def create_schema(self):
+        """
+        Create the schema of the gym if it does not exist yet.
+
+        The extensions the migrations need are installed in ``public``
+        beforehand: an extension exists once per database, and installed
+        from a gym's search_path it would land in that gym's schema, out of
+        the other gyms' reach. One installed in a gym schema by an earlier
+        version is moved to ``public``.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {self.ops.quote_name(self.schema_name)}')
+            for extension in self.shared_extensions:
+                cursor.execute(
+                    "SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname = %s",
+                    [extension],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(f'CREATE EXTENSION IF NOT EXISTS {self.ops.quote_name(extension)} SCHEMA public')
+                elif row[0] != 'public':
+                    cursor.execute(f'ALTER EXTENSION {self.ops.quote_name(extension)} SET SCHEMA public')
@@ -0,0 +1,24 @@
+from django.db.backends.postgresql import introspection
+
+
+class DatabaseIntrospection(introspection.DatabaseIntrospection):
+    def get_table_list(self, cursor):
+        """
+        Return the tables and views of the gym schema only.
+
+        ``public`` is also on the search_path, for the shared extensions, and
+        holds the tables of the main database; among them ``django_migrations``,
+        which the migration recorder would otherwise take for the gym's own.
+        """
+        tables = super().get_table_list(cursor)
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+            """,
+            [self.connection.schema_name],
+        )
+        own = {row[0] for row in cursor.fetchall()}
+        return [table for table in tables if table.name in own]
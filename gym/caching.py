@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache with a bounded size and a time to live.
+
+    The least recently used key is evicted once ``maxsize`` keys are stored,
+    and a key older than ``ttl`` seconds counts as a miss. Hits, misses and
+    evictions are counted for monitoring.
+    """
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys):
+        """
+        Get the fresh values stored for some keys.
+
+        Returns:
+            dict: The values found, keyed by key; missing and expired keys are left out
+        """
+        now = self.timer()
+        found = {}
+        with self.lock:
+            for key in keys:
+                item = self.data.get(key)
+                if item is not None and item[1] > now:
+                    self.data.move_to_end(key)
+                    found[key] = item[0]
+                    self.hits += 1
+                else:
+                    if item is not None:
+                        del self.data[key]
+                    self.misses += 1
+        return found
+
+    def get(self, key, default=None):
+        """
+        Get the fresh value stored for a key.
+        """
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, mapping):
+        """
+        Store several values, evicting the least recently used keys if needed.
+        """
+        expires = self.timer() + self.ttl
+        with self.lock:
+            for key, value in mapping.items():
+                self.data[key] = (value, expires)
+                self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key, value):
+        """
+        Store a value.
+        """
+        self.set_many({key: value})
+
+    def delete_many(self, keys):
+        """
+        Drop several keys.
+        """
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every key.
+        """
+        with self.lock:
+            self.data.clear()
+
+    def stats(self):
+        """
+        Get the size and the hit/miss counters of the cache.
+        """
+        with self.lock:
+            return {
+                'size': len(self.data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -1,16 +1,20 @@
 from django.conf import settings
 
+from accounts import tenants
+
 class DynamicDatabaseRouter:
     def db_for_read(self, model, **hints):
         if model._meta.app_label == 'management':
-            print(hints)
             # Route to the database for the specific gym
             org_name = hints.get('db_name')
             if org_name:
-                print(org_name)
-                db_alias = f'{org_name}_db'
-                if db_alias in settings.DATABASES:
+                db_alias = tenants.get_alias(org_name)
+                if tenants.resolve(db_alias):
                     return db_alias
+            # Otherwise use the gym of the request being handled
+            tenant = tenants.current_tenant.get()
+            if tenant:
+                return tenant
         return 'default'
 
     def db_for_write(self, model, **hints):
@@ -18,9 +22,13 @@ class DynamicDatabaseRouter:
             # Route to the database for the specific gym
             org_name = hints.get('db_name')
             if org_name:
-                db_alias = f'{org_name}_db'
-                if db_alias in settings.DATABASES:
+                db_alias = tenants.get_alias(org_name)
+                if tenants.resolve(db_alias):
                     return db_alias
+            # Otherwise use the gym of the request being handled
+            tenant = tenants.current_tenant.get()
+            if tenant:
+                return tenant
         return 'default'
 
     def allow_relation(self, obj1, obj2, **hints):
@@ -78,6 +78,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'accounts',
@@ -88,6 +89,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.TenantMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -122,6 +124,8 @@ ROOT_URLCONF = 'gym.urls'
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=60),
+    # Adds the db_name claim, telling clients the gym of the user.
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.TenantTokenObtainPairSerializer",
     }
 
 
@@ -169,9 +173,88 @@ DATABASES = {
     }
 }
 
+# Gym database used by the test suite, created and migrated by the test runner.
+if 'test' in sys.argv:
+    DATABASES['testgym_db'] = {**DATABASES['default'], 'NAME': 'testgym_db', 'TEST': {'DEPENDENCIES': []}}
+
 DATABASE_ROUTERS = ['gym.db_routers.DynamicDatabaseRouter']
 
 
+# Turnstile check-in ingestion (management.ingest): events are written in
+# micro-batches of CHECKIN_BATCH_SIZE or every CHECKIN_FLUSH_INTERVAL seconds.
+CHECKIN_BATCH_SIZE = int(os.environ.get('CHECKIN_BATCH_SIZE', 500))
+CHECKIN_FLUSH_INTERVAL = float(os.environ.get('CHECKIN_FLUSH_INTERVAL', 1.0))
+# Failed flushes of a batch before its failing events are isolated and dropped.
+CHECKIN_MAX_ATTEMPTS = int(os.environ.get('CHECKIN_MAX_ATTEMPTS', 3))
+
+# Live occupancy counters (management.occupancy) are reconciled against the
+# database once they are older than this many seconds.
+OCCUPANCY_RECONCILE_INTERVAL = int(os.environ.get('OCCUPANCY_RECONCILE_INTERVAL', 300))
+
+# In-process cache of member validity windows (management.memberships) used to
+# validate check-ins: at most MEMBERSHIP_CACHE_SIZE members per gym, each kept
+# for MEMBERSHIP_CACHE_TTL seconds.
+MEMBERSHIP_CACHE_SIZE = int(os.environ.get('MEMBERSHIP_CACHE_SIZE', 10000))
+MEMBERSHIP_CACHE_TTL = int(os.environ.get('MEMBERSHIP_CACHE_TTL', 300))
+
+# In-process cache of trainer schedules (management.schedules) used to detect
+# double-booked trainers: at most SCHEDULE_CACHE_SIZE trainers per gym, each
+# kept for SCHEDULE_CACHE_TTL seconds.
+SCHEDULE_CACHE_SIZE = int(os.environ.get('SCHEDULE_CACHE_SIZE', 1000))
+SCHEDULE_CACHE_TTL = int(os.environ.get('SCHEDULE_CACHE_TTL', 300))
+
+# How gym data is isolated: 'database' gives each gym its own PostgreSQL
+# database; 'schema' gives each gym a schema of TENANT_SCHEMA_DATABASE, and all
+# gyms share one connection pool of TENANT_MAX_CONNECTIONS connections. Gym
+# databases are moved into schemas with the move_tenant_to_schema command
+# before switching.
+TENANT_MODE = os.environ.get('TENANT_MODE', 'database')
+TENANT_SCHEMA_DATABASE = os.environ.get('TENANT_SCHEMA_DATABASE', os.environ.get('DATABASE_NAME'))
+
+# Registry of gym databases (accounts.tenants): aliases are looked up in
+# GymDetails on first use and re-checked after TENANT_CACHE_TTL seconds, so a
+# gym deleted or renamed by another worker stops resolving; unknown aliases
+# are remembered for TENANT_MISS_TTL seconds. Each cache holds at most
+# TENANT_CACHE_SIZE aliases. The gym of each admin is kept for
+# TENANT_CACHE_TTL seconds in the shared cache below.
+TENANT_CACHE_SIZE = int(os.environ.get('TENANT_CACHE_SIZE', 10000))
+TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', 300))
+TENANT_MISS_TTL = int(os.environ.get('TENANT_MISS_TTL', 30))
+
+# Connection pools of gym databases (accounts.pools), per worker process. A
+# gym gets a pool of at most TENANT_POOL_MAX_SIZE connections, each closed
+# after TENANT_POOL_MAX_IDLE idle seconds, and waits at most
+# TENANT_POOL_TIMEOUT seconds for one. Pools of gyms unused for
+# TENANT_POOL_IDLE_TTL seconds are closed, and so are the least recently used
+# ones whenever the open pools could hold more than TENANT_MAX_CONNECTIONS
+# connections. Keep TENANT_MAX_CONNECTIONS times the number of worker
+# processes below PostgreSQL's max_connections.
+TENANT_POOL_MAX_SIZE = int(os.environ.get('TENANT_POOL_MAX_SIZE', 4))
+TENANT_POOL_MAX_IDLE = int(os.environ.get('TENANT_POOL_MAX_IDLE', 60))
+TENANT_POOL_TIMEOUT = float(os.environ.get('TENANT_POOL_TIMEOUT', 10))
+TENANT_POOL_IDLE_TTL = int(os.environ.get('TENANT_POOL_IDLE_TTL', 600))
+TENANT_MAX_CONNECTIONS = int(os.environ.get('TENANT_MAX_CONNECTIONS', 40))
+
+
+# Cache
+# Counters shared between workers need a shared cache; without REDIS_URL every
+# process keeps its own local-memory cache.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -18,18 +18,32 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt import views as jwt_views 
-from accounts.views import LogoutAPIView
+from accounts.views import LogoutAPIView, TenantPoolStatsView
 from management.views import (
     MemberListCreateView,
+    MemberSearchView,
+    MembershipCacheStatsView,
     MemberRetrieveUpdateDestroyView,
     MemberEntryListCreateView,
+    MemberEntryIngestView,
+    OccupancyView,
+    MemberVisitSummaryListView,
     MemberEntryRetrieveUpdateDestroyView,
     TrainerListCreateView,
     TrainerRetrieveUpdateDestroyView,
+    TrainerTimetableListView,
+    TrainerTimetableView,
     GymClassListCreateView,
+    GymClassConflictsView,
+    GymClassRosterView,
+    EnrollmentCreateView,
+    EnrollmentDestroyView,
     GymClassRetrieveUpdateDestroyView,
     PaymentListCreateView,
-    PaymentRetrieveUpdateDestroyView
+    PaymentSummaryView,
+    ForecastView,
+    PaymentRetrieveUpdateDestroyView,
+    CSVImportView,
 )
 
 router = DefaultRouter()
@@ -41,19 +55,35 @@ urlpatterns = [
     path('api/login/', jwt_views.TokenObtainPairView.as_view(), name ='login'), 
     path('api/logout/', LogoutAPIView.as_view(), name='logout'),
     path('api/token/refresh/', jwt_views.TokenRefreshView.as_view(), name ='token_refresh'),
+    path('api/tenants/pools/', TenantPoolStatsView.as_view(), name='tenant-pool-stats'),
     path('api/', include(router.urls)),
     path('api/members/', MemberListCreateView.as_view(), name='member-list-create'),
+    path('api/members/search/', MemberSearchView.as_view(), name='member-search'),
+    path('api/members/membership-cache/', MembershipCacheStatsView.as_view(), name='membership-cache-stats'),
     path('api/members/<int:pk>/', MemberRetrieveUpdateDestroyView.as_view(), name='member-retrieve-update-destroy'),
     
     path('api/member-entries/', MemberEntryListCreateView.as_view(), name='member-entry-list-create'),
+    path('api/member-entries/ingest/', MemberEntryIngestView.as_view(), name='member-entry-ingest'),
+    path('api/member-entries/occupancy/', OccupancyView.as_view(), name='member-entry-occupancy'),
     path('api/member-entries/<int:pk>/', MemberEntryRetrieveUpdateDestroyView.as_view(), name='member-entry-retrieve-update-destroy'),
+    path('api/member-visits/', MemberVisitSummaryListView.as_view(), name='member-visit-list'),
     
     path('api/trainers/', TrainerListCreateView.as_view(), name='trainer-list-create'),
+    path('api/trainers/timetable/', TrainerTimetableListView.as_view(), name='trainer-timetable-list'),
     path('api/trainers/<int:pk>/', TrainerRetrieveUpdateDestroyView.as_view(), name='trainer-retrieve-update-destroy'),
+    path('api/trainers/<int:pk>/timetable/', TrainerTimetableView.as_view(), name='trainer-timetable'),
     
     path('api/gym-classes/', GymClassListCreateView.as_view(), name='gym-class-list-create'),
+    path('api/gym-classes/conflicts/', GymClassConflictsView.as_view(), name='gym-class-conflicts'),
     path('api/gym-classes/<int:pk>/', GymClassRetrieveUpdateDestroyView.as_view(), name='gym-class-retrieve-update-destroy'),
+    path('api/gym-classes/<int:pk>/roster/', GymClassRosterView.as_view(), name='gym-class-roster'),
+    path('api/gym-classes/<int:pk>/enrollments/', EnrollmentCreateView.as_view(), name='gym-class-enrollment-create'),
+    path('api/gym-classes/<int:pk>/enrollments/<int:member_id>/', EnrollmentDestroyView.as_view(), name='gym-class-enrollment-destroy'),
     
     path('api/payments/', PaymentListCreateView.as_view(), name='payment-list-create'),
+    path('api/payments/summary/', PaymentSummaryView.as_view(), name='payment-summary'),
     path('api/payments/<int:pk>/', PaymentRetrieveUpdateDestroyView.as_view(), name='payment-retrieve-update-destroy'),
+    
+    path('api/analytics/forecast/', ForecastView.as_view(), name='analytics-forecast'),
+    path('api/imports/<str:resource>/', CSVImportView.as_view(), name='csv-import'),
 ]
\ No newline at end of file
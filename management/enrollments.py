@@ -0,0 +1,68 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+
+from .exceptions import AlreadyEnrolled, ClassFull
+from .models import Enrollment, GymClass
+
+
+def enroll(db_name, class_id, member_id):
+    """
+    Enroll a member in a class without ever going over its capacity.
+
+    A seat is taken with a single conditional ``UPDATE ... SET enrolled_count
+    = enrolled_count + 1 WHERE enrolled_count < capacity``. The row lock it
+    takes serialises concurrent enrollments, so the check and the increment
+    cannot interleave. The enrollment row is written in the same transaction,
+    and a duplicate gives the seat back by rolling everything back.
+
+    Args:
+        db_name (str): The gym database of the class
+        class_id (int): The id of the class
+        member_id (int): The id of the member, who must exist
+
+    Returns:
+        Enrollment: The new enrollment
+    """
+    with transaction.atomic(using=db_name):
+        taken = GymClass.objects.using(db_name).filter(pk=class_id, enrolled_count__lt=F('capacity')).update(
+            enrolled_count=F('enrolled_count') + 1,
+            updated_at=timezone.now(),
+        )
+        if not taken:
+            if not GymClass.objects.using(db_name).filter(pk=class_id).exists():
+                raise NotFound('Class not found.')
+            raise ClassFull()
+        try:
+            with transaction.atomic(using=db_name):
+                return Enrollment.objects.using(db_name).create(gym_class_id=class_id, member_id=member_id)
+        except IntegrityError:
+            raise AlreadyEnrolled()
+
+
+def unenroll(db_name, class_id, member_id):
+    """
+    Remove a member from a class and free their seat.
+
+    Returns:
+        bool: Whether the member was enrolled
+    """
+    with transaction.atomic(using=db_name):
+        deleted, _ = Enrollment.objects.using(db_name).filter(gym_class_id=class_id, member_id=member_id).delete()
+        if deleted:
+            GymClass.objects.using(db_name).filter(pk=class_id).update(
+                enrolled_count=F('enrolled_count') - 1,
+                updated_at=timezone.now(),
+            )
+    return bool(deleted)
+
+
+def release_member_seats(db_name, member_id):
+    """
+    Free the seats of a member about to be deleted, whose enrollments cascade.
+    """
+    GymClass.objects.using(db_name).filter(enrollments__member_id=member_id).update(
+        enrolled_count=F('enrolled_count') - 1,
+        updated_at=timezone.now(),
+    )
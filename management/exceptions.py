@@ -0,0 +1,29 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class ScheduleConflict(APIException):
+    """
+    Raised when a write would book a trainer for two overlapping classes.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The trainer already has a class at this time.'
+    default_code = 'conflict'
+
+
+class ClassFull(APIException):
+    """
+    Raised when enrolling in a class that has reached its capacity.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The class is full.'
+    default_code = 'class_full'
+
+
+class AlreadyEnrolled(APIException):
+    """
+    Raised when enrolling a member in a class they already attend.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The member is already enrolled in this class.'
+    default_code = 'already_enrolled'
@@ -0,0 +1,93 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+
+EXPORT_QUERY_PARAM = 'export'
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """
+    Pseudo-buffer handing every written line straight back to the caller,
+    so csv.writer can be used as a generator.
+    """
+    def write(self, value):
+        return value
+
+
+def get_export_format(request):
+    """
+    Get the export format requested through ``?export=``, if any.
+
+    Args:
+        request: The request object
+
+    Returns:
+        str: The export format, or None for a regular JSON response
+    """
+    export_format = request.query_params.get(EXPORT_QUERY_PARAM)
+    if export_format is None:
+        return None
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError({EXPORT_QUERY_PARAM: f'Unsupported export format. Choose one of: {", ".join(EXPORT_FORMATS)}.'})
+    return export_format
+
+
+def iter_rows(queryset, reader, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield serialized rows from a server-side cursor, one chunk at a time.
+    """
+    to_representation = reader.to_representation
+    for row in reader.project(queryset).iterator(chunk_size=chunk_size):
+        yield to_representation(row)
+
+
+def iter_ndjson(rows):
+    """
+    Yield one JSON document per row.
+    """
+    encoder = JSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def iter_csv(rows, header):
+    """
+    Yield a CSV header followed by one CSV line per row.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([row[name] for name in header])
+
+
+def stream_export(queryset, reader, export_format, filename):
+    """
+    Stream a queryset as NDJSON or CSV without materialising it in memory.
+
+    Args:
+        queryset: The queryset to export
+        reader (CompiledReader): The compiled reader used to represent each row
+        export_format (str): Either ``ndjson`` or ``csv``
+        filename (str): Base name of the downloaded file
+
+    Returns:
+        StreamingHttpResponse: The streaming response
+    """
+    rows = iter_rows(queryset, reader)
+    if export_format == 'csv':
+        content = iter_csv(rows, reader.names)
+    else:
+        content = iter_ndjson(rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
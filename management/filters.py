@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class RangeFilterBackend(BaseFilterBackend):
+    """
+    Filter backend for indexed range and exact-match filters.
+
+    Views list the columns they allow in ``range_filter_fields`` and
+    ``exact_filter_fields``. Range columns accept ``<field>__gte``,
+    ``<field>__gt``, ``<field>__lte`` and ``<field>__lt``; exact columns accept
+    ``<field>=value``. Values are parsed with the model field, so invalid
+    input is a 400 instead of a database error.
+    """
+    range_lookups = ('gte', 'gt', 'lte', 'lt')
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Apply the range and exact filters found in the query string.
+        """
+        filters = {}
+        for field_name in getattr(view, 'range_filter_fields', ()):
+            for lookup in self.range_lookups:
+                param = f'{field_name}__{lookup}'
+                if param in request.query_params:
+                    filters[param] = self.parse_value(queryset.model, field_name, param, request.query_params[param])
+
+        for field_name in getattr(view, 'exact_filter_fields', ()):
+            if field_name in request.query_params:
+                filters[field_name] = self.parse_value(queryset.model, field_name, field_name, request.query_params[field_name])
+
+        if filters:
+            queryset = queryset.filter(**filters)
+        return queryset
+
+    def parse_value(self, model, field_name, param, value):
+        """
+        Convert a query string value to the Python type of a model field.
+        """
+        field = model._meta.get_field(field_name)
+        try:
+            value = field.to_python(value)
+        except DjangoValidationError as exc:
+            raise ValidationError({param: exc.messages})
+
+        if field.choices and value not in dict(field.flatchoices):
+            raise ValidationError({param: [f'"{value}" is not a valid choice.']})
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
@@ -0,0 +1,170 @@
+import hashlib
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, FloatField, Max
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import DailyRevenue, Member, Payment
+
+
+FORECAST_DAYS = 90
+MAX_FORECAST_DAYS = 365
+
+# Renewal rates are estimated separately for members on their 1st, 2nd and
+# 3rd-or-later paid membership: loyal members renew more often.
+TENURE_BUCKETS = 3
+
+
+def to_days(values):
+    """
+    Convert dates to an array of day numbers (proleptic Gregorian ordinals).
+    """
+    return np.fromiter((value.toordinal() for value in values), dtype=np.int64)
+
+
+def load_arrays(db_name):
+    """
+    Load the member and payment columns needed by the forecast, one query each.
+
+    Returns:
+        tuple: Member ids and ``membership_end`` days sorted by id, then the
+        member index, day and amount of every payment
+    """
+    members = list(Member.objects.using(db_name).order_by('id').values_list('id', 'membership_end'))
+    # Amounts are only used as floats, so the database converts them instead
+    # of building a Decimal per row.
+    payments = list(
+        Payment.objects.using(db_name).order_by()
+        .annotate(amount_value=Cast('amount', FloatField()))
+        .values_list('member_id', 'payment_date', 'amount_value')
+    )
+
+    member_ids = np.fromiter((row[0] for row in members), dtype=np.int64, count=len(members))
+    membership_end = to_days([row[1] for row in members])
+    payer_ids = np.fromiter((row[0] for row in payments), dtype=np.int64, count=len(payments))
+    payment_days = to_days([row[1] for row in payments])
+    amounts = np.fromiter((row[2] for row in payments), dtype=np.float64, count=len(payments))
+
+    # Payments of members deleted meanwhile cannot be matched and are dropped.
+    payer_index = np.searchsorted(member_ids, payer_ids)
+    known = payer_index < len(member_ids)
+    known[known] = member_ids[payer_index[known]] == payer_ids[known]
+    return member_ids, membership_end, payer_index[known], payment_days[known], amounts[known]
+
+
+def compute_forecast(today, days, membership_end, payer_index, payment_days, amounts):
+    """
+    Forecast renewals and revenue from member and payment arrays.
+
+    Every payment after a member's first one counts as a renewal, and a
+    member whose membership has expired counts as a churn at their last
+    tenure. The renewal rate of each tenure bucket is ``renewals / (renewals
+    + churns)``. Each member expiring within the horizon is expected to renew
+    with the rate of their bucket and to pay their latest amount again.
+
+    Args:
+        today (int): The day number of today
+        days (int): The number of days to forecast
+        membership_end (ndarray): The last membership day of every member
+        payer_index (ndarray): The member index of every payment
+        payment_days (ndarray): The day number of every payment
+        amounts (ndarray): The amount of every payment
+
+    Returns:
+        dict: Daily ``expiring``, ``expected_renewals`` and ``expected_revenue``
+        arrays plus the renewal rate of each tenure bucket
+    """
+    member_count = len(membership_end)
+    paid = np.bincount(payer_index, minlength=member_count)
+    tenure = np.minimum(paid, TENURE_BUCKETS)
+
+    # Renewals at tenure b: members with more than b payments; the last
+    # bucket also gathers every renewal beyond it.
+    renewals = np.array([np.count_nonzero(paid > bucket) for bucket in range(1, TENURE_BUCKETS)] + [np.maximum(paid - TENURE_BUCKETS, 0).sum()], dtype=np.float64)
+    expired = (membership_end < today) & (paid > 0)
+    churns = np.bincount(tenure[expired], minlength=TENURE_BUCKETS + 1)[1:].astype(np.float64)
+    opportunities = renewals + churns
+    overall = renewals.sum() / opportunities.sum() if opportunities.sum() else 0.0
+    rates = np.divide(renewals, opportunities, out=np.full(TENURE_BUCKETS, overall), where=opportunities > 0)
+    # Members who never paid get the overall rate.
+    member_rates = np.concatenate(([overall], rates))[tenure]
+
+    # Latest payment amount per member: the last row of each member once
+    # payments are sorted by member and day.
+    order = np.lexsort((payment_days, payer_index))
+    sorted_payers = payer_index[order]
+    last = np.append(sorted_payers[1:] != sorted_payers[:-1], True) if len(order) else np.zeros(0, dtype=bool)
+    last_amount = np.full(member_count, amounts.mean() if len(amounts) else 0.0)
+    last_amount[sorted_payers[last]] = amounts[order][last]
+
+    offset = membership_end - today
+    upcoming = (offset >= 0) & (offset < days)
+    offset = offset[upcoming]
+    expected = member_rates[upcoming]
+    return {
+        'expiring': np.bincount(offset, minlength=days),
+        'expected_renewals': np.bincount(offset, weights=expected, minlength=days),
+        'expected_revenue': np.bincount(offset, weights=expected * last_amount[upcoming], minlength=days),
+        'renewal_rates': rates,
+        'overall_rate': overall,
+    }
+
+
+def data_version(db_name):
+    """
+    Get a key changing whenever payments or memberships of a gym change.
+
+    Payment writes always touch the small daily revenue rollup, so its last
+    update time stands in for the payments table.
+    """
+    revenue = DailyRevenue.objects.using(db_name).aggregate(updated=Max('updated_at'), count=Count('id'))
+    members = Member.objects.using(db_name).aggregate(updated=Max('updated_at'), count=Count('id'))
+    key = ':'.join(str(value) for value in (revenue['updated'], revenue['count'], members['updated'], members['count']))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def forecast(db_name, days=FORECAST_DAYS):
+    """
+    Get the renewal and revenue forecast of a gym for the next ``days`` days.
+
+    Results are cached per gym until payments or members change, or the day
+    changes.
+
+    Returns:
+        dict: The per-day forecast with totals and the renewal rates used
+    """
+    today = timezone.localdate()
+    key = f'forecast:{db_name}:{today.isoformat()}:{days}:{data_version(db_name)}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    member_ids, membership_end, payer_index, payment_days, amounts = load_arrays(db_name)
+    computed = compute_forecast(today.toordinal(), days, membership_end, payer_index, payment_days, amounts)
+
+    result = {
+        'days': [
+            {
+                'date': (today + timedelta(days=offset)).isoformat(),
+                'expiring': int(expiring),
+                'expected_renewals': round(float(renewals), 2),
+                'expected_revenue': f'{revenue:.2f}',
+            }
+            for offset, expiring, renewals, revenue in zip(
+                range(days), computed['expiring'], computed['expected_renewals'], computed['expected_revenue']
+            )
+        ],
+        'expiring': int(computed['expiring'].sum()),
+        'expected_renewals': round(float(computed['expected_renewals'].sum()), 2),
+        'expected_revenue': f"{computed['expected_revenue'].sum():.2f}",
+        'renewal_rates': {
+            str(bucket + 1) if bucket + 1 < TENURE_BUCKETS else f'{TENURE_BUCKETS}+': round(float(rate), 4)
+            for bucket, rate in enumerate(computed['renewal_rates'])
+        },
+        'overall_renewal_rate': round(float(computed['overall_rate']), 4),
+    }
+    cache.set(key, result, timeout=24 * 60 * 60)
+    return result
@@ -0,0 +1,160 @@
+import csv
+import io
+import itertools
+import json
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import revenue
+from .serializers import MemberSerializer, PaymentSerializer
+
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Resources that can be imported, keyed by the name used in URLs and commands.
+IMPORT_SERIALIZERS = {
+    'members': MemberSerializer,
+    'payments': PaymentSerializer,
+}
+
+
+def iter_chunks(rows, size):
+    """
+    Split an iterable of rows into lists of at most ``size`` rows.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def copy_rows(db_name, model, rows):
+    """
+    Load validated rows into the table of a model with PostgreSQL ``COPY``.
+
+    The rows are written to an in-memory CSV buffer and streamed in a single
+    ``COPY ... FROM STDIN``, skipping per-row INSERT parsing and planning.
+    Timestamps that Django would fill on save are set here.
+
+    Args:
+        db_name (str): The gym database to load into
+        model: The model whose table receives the rows
+        rows (list): The validated data of each row, keyed by field name
+    """
+    now = timezone.now()
+    columns = [
+        field.column for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    attnames = [
+        field.attname for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    timestamps = {
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    }
+
+    buffer = io.StringIO()
+    # Strings are quoted, so only a missing value is loaded as NULL.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        values = []
+        for attname in attnames:
+            value = now if attname in timestamps else row.get(attname)
+            values.append(None if value is None else value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        writer.writerow(values)
+
+    connection = connections[db_name]
+    quote = connection.ops.quote_name
+    sql = (
+        f"COPY {quote(model._meta.db_table)} ({', '.join(quote(column) for column in columns)}) "
+        f"FROM STDIN WITH (FORMAT csv)"
+    )
+    with connection.cursor() as cursor, cursor.copy(sql) as copy:
+        copy.write(buffer.getvalue())
+
+
+def load_rows(db_name, model, rows, batch_size=1000):
+    """
+    Load validated rows with ``COPY`` on PostgreSQL, or bulk_create elsewhere.
+    """
+    if connections[db_name].vendor == 'postgresql':
+        copy_rows(db_name, model, rows)
+    else:
+        model.objects.using(db_name).bulk_create([model(**row) for row in rows], batch_size=batch_size)
+
+
+def import_csv(db_name, resource, file, chunk_size=IMPORT_CHUNK_SIZE, on_error=None):
+    """
+    Import a CSV file of members or payments into a gym database.
+
+    The file is parsed as a stream and handled in chunks: each chunk is
+    validated with the resource serializer rules (including the unique email
+    of members, checked against the payload and the database, so duplicates
+    after the first occurrence are rejected) and its valid rows are loaded
+    in one transaction. Imported payments are counted in the daily revenue
+    rollup within the same transaction.
+
+    Args:
+        db_name (str): The gym database to import into
+        resource (str): One of ``IMPORT_SERIALIZERS``
+        file: A text file object with a header row of serializer field names
+        chunk_size (int): The number of rows validated and loaded together
+        on_error (callable): Called with ``(line, row, errors)`` for each rejected row, ``line``
+            being the file line the row ends on
+
+    Returns:
+        dict: The number of imported and rejected rows
+    """
+    serializer_class = IMPORT_SERIALIZERS[resource]
+    model = serializer_class.Meta.model
+    reader = csv.DictReader(file)
+    # A quoted field may span several lines, so each row is paired with the
+    # line it ends on as counted by the reader.
+    numbered = ((reader.line_num, row) for row in reader)
+    imported = rejected = 0
+
+    for chunk in iter_chunks(numbered, chunk_size):
+        lines, data = zip(*chunk)
+        serializer = serializer_class(data=list(data), many=True, context={'db_name': db_name})
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+
+        with transaction.atomic(using=db_name):
+            load_rows(db_name, model, rows)
+            if model is PaymentSerializer.Meta.model:
+                revenue.apply(db_name, revenue.collect(
+                    (row['payment_date'], row['payment_method'], row['amount']) for row in rows
+                ))
+
+        for error in serializer.item_errors:
+            if on_error is not None:
+                on_error(lines[error['index']], data[error['index']], error['errors'])
+        imported += len(rows)
+        rejected += len(serializer.item_errors)
+
+    return {'imported': imported, 'rejected': rejected}
+
+
+class ErrorReport:
+    """
+    CSV report of the rows rejected by an import, with their line number and errors.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.writer = None
+        self.count = 0
+
+    def __call__(self, line, row, errors):
+        """
+        Write one rejected row to the report.
+        """
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=['line', *row.keys(), 'errors'], extrasaction='ignore')
+            self.writer.writeheader()
+        self.writer.writerow({'line': line, **row, 'errors': json.dumps(errors)})
+        self.count += 1
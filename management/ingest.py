@@ -0,0 +1,272 @@
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from . import occupancy
+from .models import MemberEntry
+
+logger = logging.getLogger(__name__)
+
+
+CHECK_IN = 'in'
+CHECK_OUT = 'out'
+
+
+def write_events(db_name, events):
+    """
+    Write a batch of turnstile events to the MemberEntry table of a gym.
+
+    Events are applied in arrival order: a check-in opens a new entry, a
+    check-out closes the entry opened earlier in the same batch or, failing
+    that, the member's latest open entry in the database. Everything is
+    written in one transaction with one INSERT and at most one UPDATE.
+
+    Args:
+        db_name (str): The gym database to write to
+        events (list): The validated events, each with ``member_id``,
+            ``direction`` and ``timestamp``
+
+    Returns:
+        tuple: The number of entries opened and closed
+    """
+    new_entries = []
+    pending = {}
+    closing = {}
+    for event in events:
+        member_id = event['member_id']
+        if event['direction'] == CHECK_IN:
+            entry = MemberEntry(member_id=member_id, entry_time=event['timestamp'])
+            new_entries.append(entry)
+            pending[member_id] = entry
+        elif member_id in pending:
+            pending.pop(member_id).exit_time = event['timestamp']
+        else:
+            closing.setdefault(member_id, event['timestamp'])
+
+    closed = []
+    with transaction.atomic(using=db_name):
+        if closing:
+            open_entries = (
+                MemberEntry.objects.using(db_name)
+                .filter(member_id__in=closing, exit_time__isnull=True)
+                .order_by('member_id', '-entry_time')
+            )
+            now = timezone.now()
+            for entry in open_entries:
+                if entry.member_id in closing:
+                    entry.exit_time = closing.pop(entry.member_id)
+                    entry.updated_at = now
+                    closed.append(entry)
+            MemberEntry.objects.using(db_name).bulk_update(closed, ['exit_time', 'updated_at'])
+        MemberEntry.objects.using(db_name).bulk_create(new_entries, batch_size=settings.CHECKIN_BATCH_SIZE)
+        occupancy.adjust(db_name, sum(entry.exit_time is None for entry in new_entries) - len(closed))
+
+    return len(new_entries), len(closed)
+
+
+class CheckinBuffer:
+    """
+    In-process buffer of turnstile events for one gym database.
+
+    Events are acknowledged as soon as they are buffered and written in
+    micro-batches, either when ``batch_size`` events are waiting or
+    ``flush_interval`` seconds after the first of them arrived. Flushes are
+    serialised, so events of the same member reach the database in the order
+    they were received by this process. Callers that need durability can wait
+    for the flush covering their events with ``wait()``.
+
+    A batch that fails is kept in front of the buffer and tried again by the
+    timer, after a delay doubling from ``flush_interval`` up to
+    ``max_retry_delay`` seconds, or by an earlier flush. Once it has failed ``max_attempts`` times with an error other
+    than a lost connection, it is written in halves down to single events,
+    and the events that still fail are logged and dropped; ``dropped()``
+    reports them to the callers waiting for them.
+    """
+    # Number of dropped events remembered for the waiting callers.
+    dropped_history = 1000
+    # Longest wait, in seconds, before retrying a batch that failed.
+    max_retry_delay = 60
+
+    def __init__(self, db_name, batch_size, flush_interval, max_attempts):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        # (ticket, event) pairs, the ticket being the event's arrival number.
+        self.events = []
+        self.accepted = 0
+        self.flushed = 0
+        self.failed = 0
+        self.attempts = 0
+        self.dropped_events = OrderedDict()
+        self.timer = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flushed_condition = threading.Condition()
+
+    def add(self, events):
+        """
+        Buffer events and return the ticket to wait on for their flush.
+        """
+        with self.lock:
+            self.events.extend(enumerate(events, self.accepted + 1))
+            self.accepted += len(events)
+            ticket = self.accepted
+            full = len(self.events) >= self.batch_size
+            if not full:
+                self.start_timer(self.flush_interval)
+
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the events stay buffered for the next flush.
+                pass
+        return ticket
+
+    def flush(self):
+        """
+        Write every buffered event to the database.
+        """
+        with self.flush_lock:
+            with self.lock:
+                events, self.events = self.events, []
+                accepted = self.accepted
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+
+            if events:
+                try:
+                    self.write(events)
+                except Exception:
+                    # Put the batch back in front so nothing acknowledged is
+                    # lost and per-member order is kept on the next flush.
+                    self.attempts += 1
+                    with self.lock:
+                        self.events[:0] = events
+                        self.start_timer(min(self.flush_interval * 2 ** (self.attempts - 1), self.max_retry_delay))
+                    with self.flushed_condition:
+                        self.failed = accepted
+                        self.flushed_condition.notify_all()
+                    logger.exception('Failed to flush %d check-in events for %s', len(events), self.db_name)
+                    raise
+                self.attempts = 0
+
+            with self.flushed_condition:
+                self.flushed = accepted
+                self.flushed_condition.notify_all()
+
+    def start_timer(self, delay):
+        """
+        Schedule a flush in ``delay`` seconds unless one is scheduled; ``lock`` must be held.
+        """
+        if self.timer is None:
+            self.timer = threading.Timer(delay, self.timed_flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def write(self, events):
+        """
+        Write a batch, isolating its failing events once it has failed ``max_attempts`` times.
+        """
+        try:
+            write_events(self.db_name, [event for _, event in events])
+        except OperationalError:
+            raise
+        except Exception:
+            if self.attempts + 1 < self.max_attempts:
+                raise
+            logger.exception('Failed to flush %d check-in events for %s %d times, isolating the failing ones', len(events), self.db_name, self.max_attempts)
+            self.write_isolating(events)
+
+    def write_isolating(self, events):
+        """
+        Write events in ever smaller batches, dropping the single events that fail.
+
+        Batches are written in arrival order. A lost connection interrupts
+        the whole write: the events written so far stay written and the
+        exception is raised with the others, which the caller puts back.
+        """
+        batches = [events]
+        while batches:
+            batch = batches.pop()
+            try:
+                write_events(self.db_name, [event for _, event in batch])
+            except OperationalError:
+                events[:] = [item for remaining in (batch, *reversed(batches)) for item in remaining]
+                raise
+            except Exception as exc:
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    batches += [batch[middle:], batch[:middle]]
+                    continue
+                ticket, event = batch[0]
+                logger.error('Dropped check-in event %s for %s: %s', event, self.db_name, exc)
+                with self.flushed_condition:
+                    self.dropped_events[ticket] = {**event, 'error': str(exc)}
+                    while len(self.dropped_events) > self.dropped_history:
+                        self.dropped_events.popitem(last=False)
+
+    def timed_flush(self):
+        """
+        Flush from the timer thread, releasing its database connection afterwards.
+
+        A failed flush has already scheduled its retry.
+        """
+        try:
+            self.flush()
+        except Exception:
+            pass
+        finally:
+            connections[self.db_name].close()
+
+    def wait(self, ticket, timeout=None):
+        """
+        Block until the events covered by a ticket have been written.
+
+        Returns:
+            bool: Whether they were written; False once the timeout expires or
+            as soon as a flush covering them fails
+        """
+        with self.flushed_condition:
+            self.flushed_condition.wait_for(lambda: self.flushed >= ticket or self.failed >= ticket, timeout=timeout)
+            return self.flushed >= ticket
+
+    def dropped(self, first, last):
+        """
+        Get the events with tickets from ``first`` to ``last`` that were dropped, with their error.
+        """
+        with self.flushed_condition:
+            return [event for ticket, event in self.dropped_events.items() if first <= ticket <= last]
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def get_buffer(db_name):
+    """
+    Get the check-in buffer of a gym database, creating it on first use.
+    """
+    with _buffers_lock:
+        if db_name not in _buffers:
+            _buffers[db_name] = CheckinBuffer(db_name, settings.CHECKIN_BATCH_SIZE, settings.CHECKIN_FLUSH_INTERVAL, settings.CHECKIN_MAX_ATTEMPTS)
+        return _buffers[db_name]
+
+
+@atexit.register
+def flush_all():
+    """
+    Flush every buffer, e.g. when the worker shuts down.
+    """
+    for buffer in list(_buffers.values()):
+        try:
+            buffer.flush()
+        except Exception:
+            pass
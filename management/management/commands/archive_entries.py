@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from accounts import tenants
+from accounts.models import GymDetails
+from management.partitions import archive_partitions, is_partitioned, is_supported
+
+
+class Command(BaseCommand):
+    """
+    Management command to roll old member entry partitions into daily visit
+    summaries and remove them
+    """
+    help = 'Archive member entry partitions older than N months into per-member daily visit summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only process this gym database alias, e.g. mygym_db')
+        parser.add_argument('--older-than', type=int, default=12, help='Archive months that ended more than this many months ago')
+        parser.add_argument('--keep-detached', action='store_true', help='Detach archived partitions instead of dropping them')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        for db_name in db_names:
+            if not tenants.resolve(db_name):
+                self.stdout.write(self.style.ERROR(f'Database connection {db_name} not found'))
+                continue
+            if not is_supported(db_name) or not is_partitioned(db_name):
+                self.stdout.write(self.style.WARNING(f'Skipping {db_name}: member entries are not partitioned'))
+                continue
+
+            try:
+                results = archive_partitions(db_name, options['older_than'], drop=not options['keep_detached'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error archiving member entries of database {db_name}: {e}'))
+                continue
+
+            for name, summarised, skipped in results:
+                if skipped:
+                    self.stdout.write(self.style.WARNING(f'Skipped {name} in {db_name}: it still has open entries'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'Archived {name} in {db_name} into {summarised} visit summaries'))
+            if not results:
+                self.stdout.write(self.style.SUCCESS(f'Nothing to archive for database: {db_name}'))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts import tenants
+from accounts.models import User
+from management.ingest import get_buffer
+from management.models import Member, MemberEntry
+from management.views import MemberEntryIngestView, MemberEntryListCreateView
+
+
+class Command(BaseCommand):
+    """
+    Management command comparing check-in throughput of the regular entry
+    endpoint with the batched ingestion endpoint
+    """
+    help = 'Benchmark check-in ingestion against POST /api/member-entries/ for a gym database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', required=True, help='Gym database alias, e.g. mygym_db')
+        parser.add_argument('--events', type=int, default=2000, help='Number of check-ins sent to each endpoint')
+        parser.add_argument('--request-size', type=int, default=100, help='Events per request on the ingestion endpoint')
+        parser.add_argument('--keep', action='store_true', help='Keep the entries created by the benchmark')
+
+    def handle(self, *args, **options):
+        db_name = options['database']
+        if not tenants.resolve(db_name):
+            raise CommandError(f'Database connection {db_name} not found')
+        member_ids = list(Member.objects.using(db_name).values_list('id', flat=True)[:1000])
+        if not member_ids:
+            raise CommandError(f'Database {db_name} has no members to check in')
+
+        last_id = MemberEntry.objects.using(db_name).order_by('-id').values_list('id', flat=True).first() or 0
+        factory = APIRequestFactory()
+        user = User(email='benchmark@localhost', is_staff=True)
+        count = options['events']
+        events = [{'member_id': member_ids[i % len(member_ids)]} for i in range(count)]
+
+        view = MemberEntryListCreateView.as_view()
+        started = time.perf_counter()
+        for event in events:
+            request = factory.post(f'/api/member-entries/?db_name={db_name}', event, format='json')
+            force_authenticate(request, user=user)
+            view(request)
+        single = time.perf_counter() - started
+
+        view = MemberEntryIngestView.as_view()
+        size = options['request_size']
+        started = time.perf_counter()
+        for start in range(0, count, size):
+            request = factory.post(f'/api/member-entries/ingest/?db_name={db_name}', events[start:start + size], format='json')
+            force_authenticate(request, user=user)
+            view(request)
+        get_buffer(db_name).flush()
+        batched = time.perf_counter() - started
+
+        self.stdout.write(f'POST /api/member-entries/         {count / single:10.0f} events/s ({single:.2f}s)')
+        self.stdout.write(f'POST /api/member-entries/ingest/  {count / batched:10.0f} events/s ({batched:.2f}s)')
+        self.stdout.write(self.style.SUCCESS(f'Speed-up: {single / batched:.1f}x'))
+
+        if not options['keep']:
+            MemberEntry.objects.using(db_name).filter(id__gt=last_id).delete()
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from accounts import tenants
+from accounts.models import GymDetails
+from management.occupancy import close_stale_entries
+
+
+class Command(BaseCommand):
+    """
+    Management command to close member entries left open by members who
+    skipped the exit scanner, for all gyms
+    """
+    help = 'Close stale open member entries of all gyms in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only process this gym database alias, e.g. mygym_db')
+        parser.add_argument('--stale-hours', type=float, default=12, help='Close entries opened more than this many hours ago')
+        parser.add_argument('--session-minutes', type=int, default=90, help='Visit length recorded for closed entries')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Maximum number of rows per UPDATE')
+        parser.add_argument('--workers', type=int, default=4, help='Number of gyms processed concurrently')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        cutoff = timezone.now() - timedelta(hours=options['stale_hours'])
+        session_length = timedelta(minutes=options['session_minutes'])
+
+        gyms = []
+        for db_name in db_names:
+            if tenants.resolve(db_name):
+                gyms.append(db_name)
+            else:
+                self.stdout.write(self.style.ERROR(f'Database connection {db_name} not found'))
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = {
+                executor.submit(self.close_entries, db_name, cutoff, session_length, options['batch_size']): db_name
+                for db_name in gyms
+            }
+            for future in as_completed(futures):
+                db_name = futures[future]
+                try:
+                    closed, elapsed = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'Error closing stale entries for database {db_name}: {e}'))
+                    continue
+                total += closed
+                self.stdout.write(self.style.SUCCESS(f'Closed {closed} stale entries for database {db_name} in {elapsed:.2f}s'))
+
+        self.stdout.write(self.style.SUCCESS(f'Closed {total} stale entries across {len(gyms)} database(s)'))
+
+    def close_entries(self, db_name, cutoff, session_length, batch_size):
+        """
+        Close the stale entries of one gym from a worker thread.
+        """
+        started = time.perf_counter()
+        try:
+            closed = close_stale_entries(db_name, cutoff, session_length, batch_size)
+        finally:
+            connections[db_name].close()
+        return closed, time.perf_counter() - started
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import tenants
+from management.forecast import FORECAST_DAYS, MAX_FORECAST_DAYS, forecast
+
+
+class Command(BaseCommand):
+    """
+    Management command to print the renewal and revenue forecast of a gym
+    """
+    help = 'Forecast membership renewals and expected revenue of a gym database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', required=True, help='Gym database alias, e.g. mygym_db')
+        parser.add_argument('--days', type=int, default=FORECAST_DAYS, help='Number of days to forecast')
+
+    def handle(self, *args, **options):
+        if not tenants.resolve(options['database']):
+            raise CommandError(f"Database connection {options['database']} not found")
+        if not 0 < options['days'] <= MAX_FORECAST_DAYS:
+            raise CommandError(f'--days must be between 1 and {MAX_FORECAST_DAYS}')
+
+        started = time.perf_counter()
+        result = forecast(options['database'], options['days'])
+        elapsed = time.perf_counter() - started
+
+        for day in result['days']:
+            if day['expiring']:
+                self.stdout.write(f"{day['date']}: {day['expiring']} expiring, {day['expected_renewals']} expected renewals, {day['expected_revenue']} expected revenue")
+        self.stdout.write(f"Renewal rates by tenure: {result['renewal_rates']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['expiring']} memberships expiring in {options['days']} days, "
+            f"{result['expected_renewals']} expected renewals, {result['expected_revenue']} expected revenue "
+            f"(computed in {elapsed:.3f}s)"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import tenants
+from management.imports import IMPORT_CHUNK_SIZE, IMPORT_SERIALIZERS, ErrorReport, import_csv
+
+
+class Command(BaseCommand):
+    """
+    Management command to import members or payments of a gym from a CSV file
+    """
+    help = 'Import members or payments from a CSV file into a gym database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(IMPORT_SERIALIZERS), help='Kind of rows in the file')
+        parser.add_argument('path', help='CSV file with a header row of field names')
+        parser.add_argument('--database', required=True, help='Gym database alias, e.g. mygym_db')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows validated and loaded per transaction')
+        parser.add_argument('--errors', help='Where to write rejected rows (default: <path>.errors.csv)')
+
+    def handle(self, *args, **options):
+        if not tenants.resolve(options['database']):
+            raise CommandError(f"Database connection {options['database']} not found")
+        errors_path = options['errors'] or f"{options['path']}.errors.csv"
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file, \
+                    open(errors_path, 'w', newline='', encoding='utf-8') as errors_file:
+                report = ErrorReport(errors_file)
+                result = import_csv(options['database'], options['resource'], file, options['chunk_size'], on_error=report)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['imported']} {options['resource']} into {options['database']} in {elapsed:.2f}s"
+        ))
+        if result['rejected']:
+            self.stdout.write(self.style.ERROR(f"Rejected {result['rejected']} rows, see {errors_path}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from accounts import tenants
+from accounts.models import GymDetails
+from management.partitions import PARTITION_MONTHS_AHEAD, ensure_partitions, is_partitioned, is_supported, partition_table
+
+
+class Command(BaseCommand):
+    """
+    Management command to partition member entries by month and keep future
+    partitions created
+    """
+    help = 'Partition the member entries of every gym by month (PostgreSQL only) and create upcoming partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only process this gym database alias, e.g. mygym_db')
+        parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD, help='Number of future months to create partitions for')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        for db_name in db_names:
+            if not tenants.resolve(db_name):
+                self.stdout.write(self.style.ERROR(f'Database connection {db_name} not found'))
+                continue
+            if not is_supported(db_name):
+                self.stdout.write(self.style.WARNING(f'Skipping {db_name}: partitioning requires PostgreSQL'))
+                continue
+
+            try:
+                if is_partitioned(db_name):
+                    created = ensure_partitions(db_name, options['months_ahead'])
+                    self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partition(s) for database: {db_name}'))
+                else:
+                    moved = partition_table(db_name, options['months_ahead'])
+                    self.stdout.write(self.style.SUCCESS(f'Partitioned member entries of database {db_name} ({moved} rows moved)'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error partitioning member entries of database {db_name}: {e}'))
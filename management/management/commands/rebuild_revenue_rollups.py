@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts import tenants
+from accounts.models import GymDetails
+from management.revenue import rebuild
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the daily revenue rollups of all gyms
+    from their payments
+    """
+    help = 'Rebuild the daily revenue rollups of all gyms from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Only process this gym database alias, e.g. mygym_db')
+
+    def handle(self, *args, **options):
+        if options['database']:
+            db_names = [options['database']]
+        else:
+            db_names = [tenants.get_alias(gym.db_name) for gym in GymDetails.objects.all()]
+
+        for db_name in db_names:
+            if not tenants.resolve(db_name):
+                self.stdout.write(self.style.ERROR(f'Database connection {db_name} not found'))
+                continue
+            try:
+                rows = rebuild(db_name)
+                self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily revenue rows for database: {db_name}'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error rebuilding daily revenue for database {db_name}: {e}'))
@@ -0,0 +1,84 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from gym.caching import LRUCache
+
+from .models import Member
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_name):
+    """
+    Get the membership cache of a gym database, creating it on first use.
+    """
+    with _caches_lock:
+        if db_name not in _caches:
+            _caches[db_name] = LRUCache(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL)
+        return _caches[db_name]
+
+
+def get_windows(db_name, member_ids):
+    """
+    Get the membership validity windows of some members.
+
+    Cached windows are returned without touching the database; the others
+    are loaded with a single query and cached.
+
+    Args:
+        db_name (str): The gym database of the members
+        member_ids (iterable): The ids of the members
+
+    Returns:
+        dict: ``(membership_start, membership_end)`` tuples keyed by member id;
+        members that do not exist are left out
+    """
+    cache = get_cache(db_name)
+    member_ids = set(member_ids)
+    windows = cache.get_many(member_ids)
+    missing = member_ids - windows.keys()
+    if missing:
+        loaded = {
+            member_id: (start, end)
+            for member_id, start, end in Member.objects.using(db_name)
+            .filter(pk__in=missing)
+            .values_list('id', 'membership_start', 'membership_end')
+        }
+        cache.set_many(loaded)
+        windows.update(loaded)
+    return windows
+
+
+def get_window(db_name, member_id):
+    """
+    Get the membership validity window of a member, or None if the member does not exist.
+    """
+    return get_windows(db_name, [member_id]).get(member_id)
+
+
+def is_active(window, day):
+    """
+    Check whether a validity window covers a day.
+    """
+    start, end = window
+    return start <= day <= end
+
+
+def invalidate(db_name, member_ids):
+    """
+    Drop the cached windows of some members once the current transaction commits.
+    """
+    member_ids = list(member_ids)
+    if member_ids:
+        transaction.on_commit(lambda: get_cache(db_name).delete_many(member_ids), using=db_name)
+
+
+def stats(db_name):
+    """
+    Get the size and hit/miss counters of the membership cache of a gym.
+    """
+    return get_cache(db_name).stats()
@@ -0,0 +1,76 @@
+# Generated by Django 5.1 on 2026-10-18 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Member',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('membership_start', models.DateField()),
+                ('membership_end', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creation time')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Trainer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('specialty', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creation time')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MemberEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_time', models.DateTimeField(auto_now_add=True)),
+                ('exit_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='management.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_date', models.DateField()),
+                ('payment_method', models.CharField(choices=[('online', 'Online'), ('cash', 'Cash')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creation time')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='management.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GymClass',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creation time')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='management.member')),
+                ('trainer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='management.trainer')),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gymclass',
+            index=models.Index(fields=['created_at', 'id'], name='class_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['membership_end', 'id'], name='member_end_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['membership_start', 'id'], name='member_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['created_at', 'id'], name='member_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberentry',
+            index=models.Index(fields=['entry_time', 'id'], name='entry_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberentry',
+            index=models.Index(fields=['member', 'entry_time'], name='entry_member_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_method', 'payment_date'], name='payment_method_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'id'], name='payment_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainer',
+            index=models.Index(fields=['created_at', 'id'], name='trainer_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Expression and operator-class indexes backing /api/members/search/. They
+# only exist on PostgreSQL; other backends (SQLite test runs) fall back to
+# plain LIKE scans in management.search.
+SEARCH_INDEXES = {
+    'member_first_name_trgm_idx': 'USING gin (first_name gin_trgm_ops)',
+    'member_last_name_trgm_idx': 'USING gin (last_name gin_trgm_ops)',
+    'member_email_trgm_idx': 'USING gin (email gin_trgm_ops)',
+    'member_first_name_prefix_idx': '(lower(first_name) text_pattern_ops)',
+    'member_last_name_prefix_idx': '(lower(last_name) text_pattern_ops)',
+    'member_email_prefix_idx': '(lower(email) text_pattern_ops)',
+    'member_phone_prefix_idx': '(phone_number varchar_pattern_ops)',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in SEARCH_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON management_member {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0002_range_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
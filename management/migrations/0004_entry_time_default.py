@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 16:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0003_member_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memberentry',
+            name='entry_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0004_entry_time_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberentry',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['entry_time'], name='entry_open_idx'),
+        ),
+    ]
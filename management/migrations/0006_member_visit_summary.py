@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-18 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0005_open_entry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberVisitSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('visits', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='management.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'id'], name='visit_summary_day_id_idx')],
+                'constraints': [models.UniqueConstraint(fields=('member', 'day'), name='visit_summary_member_day_uniq')],
+            },
+        ),
+    ]
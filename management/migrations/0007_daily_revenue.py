@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-18 16:15
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_daily_revenue(apps, schema_editor):
+    db_name = schema_editor.connection.alias
+    Payment = apps.get_model('management', 'Payment')
+    DailyRevenue = apps.get_model('management', 'DailyRevenue')
+    grouped = Payment.objects.using(db_name).order_by().values('payment_date', 'payment_method').annotate(total=Sum('amount'), count=Count('id'))
+    DailyRevenue.objects.using(db_name).bulk_create([
+        DailyRevenue(day=row['payment_date'], payment_method=row['payment_method'], total=row['total'], count=row['count'])
+        for row in grouped
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0006_member_visit_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(choices=[('online', 'Online'), ('cash', 'Cash')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='update time')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_method'), name='revenue_day_method_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_daily_revenue, migrations.RunPython.noop),
+    ]
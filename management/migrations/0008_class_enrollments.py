@@ -0,0 +1,77 @@
+# Generated by Django 5.1 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def merge_class_rows(apps, schema_editor):
+    """
+    Collapse the per-member copies of each class into one class with enrollments.
+    """
+    db_name = schema_editor.connection.alias
+    GymClass = apps.get_model('management', 'GymClass')
+    Enrollment = apps.get_model('management', 'Enrollment')
+
+    groups = {}
+    for pk, trainer_id, name, start, end, member_id in GymClass.objects.using(db_name).order_by('id').values_list(
+        'id', 'trainer_id', 'name', 'start_time', 'end_time', 'member_id'
+    ):
+        group = groups.setdefault((trainer_id, name, start, end), {'id': pk, 'copies': [], 'members': []})
+        if pk != group['id']:
+            group['copies'].append(pk)
+        if member_id is not None and member_id not in group['members']:
+            group['members'].append(member_id)
+
+    enrollments = []
+    copies = []
+    for group in groups.values():
+        enrollments.extend(Enrollment(gym_class_id=group['id'], member_id=member_id) for member_id in group['members'])
+        copies.extend(group['copies'])
+        count = len(group['members'])
+        GymClass.objects.using(db_name).filter(pk=group['id']).update(
+            enrolled_count=count,
+            capacity=Greatest(F('capacity'), count),
+        )
+    Enrollment.objects.using(db_name).bulk_create(enrollments, batch_size=1000)
+    for start in range(0, len(copies), 1000):
+        GymClass.objects.using(db_name).filter(pk__in=copies[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0007_daily_revenue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gymclass',
+            name='capacity',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='gymclass',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='gymclass',
+            name='member',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='management.member'),
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='creation time')),
+                ('gym_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='management.gymclass')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='management.member')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('gym_class', 'member'), name='enrollment_class_member_uniq')],
+            },
+        ),
+        migrations.RunPython(merge_class_rows, migrations.RunPython.noop),
+    ]
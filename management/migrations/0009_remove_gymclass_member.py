@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-18 16:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0008_class_enrollments'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='gymclass',
+            name='member',
+        ),
+    ]
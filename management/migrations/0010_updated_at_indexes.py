@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0009_remove_gymclass_member'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gymclass',
+            index=models.Index(fields=['updated_at'], name='class_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['updated_at'], name='member_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberentry',
+            index=models.Index(fields=['updated_at'], name='entry_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membervisitsummary',
+            index=models.Index(fields=['updated_at'], name='visit_summary_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainer',
+            index=models.Index(fields=['updated_at'], name='trainer_updated_idx'),
+        ),
+    ]
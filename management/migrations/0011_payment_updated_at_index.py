@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0010_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyrevenue',
+            index=models.Index(fields=['updated_at'], name='revenue_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['updated_at'], name='payment_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from .pagination import get_cursor_ordering
+from .readers import compile_reader
+
+
+class SparseFieldsMixin:
+    """
+    View mixin adding ``?fields=a,b,c`` sparse fieldsets.
+
+    On reads the queryset is narrowed with ``.only()`` to the requested columns
+    and the serializer drops every field that was not asked for.
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        """
+        Get the field names requested by the client, or None for all fields.
+        """
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = self.parse_requested_fields()
+        return self._requested_fields
+
+    def parse_requested_fields(self):
+        """
+        Parse and validate the ``fields`` query parameter.
+        """
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+
+        requested = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        available = {name for name, field in self.serializer_class().fields.items() if not field.write_only}
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({self.fields_query_param: [f'Unknown field(s): {", ".join(unknown)}.']})
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Get a serializer limited to the requested fields.
+        """
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_reader(self):
+        """
+        Get the compiled read-only fast path for the requested fields.
+        """
+        fields = self.get_requested_fields()
+        cursor_field, _ = get_cursor_ordering(self.request, self)
+        extra = ('id', cursor_field)
+        return compile_reader(self.serializer_class, tuple(fields) if fields else None, extra)
+
+    def filter_queryset(self, queryset):
+        """
+        Narrow the selected columns to the requested fields on reads.
+        """
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested_fields()
+        if fields is None or self.request.method not in SAFE_METHODS:
+            return queryset
+
+        columns = {'id', *fields}
+        if hasattr(self, 'cursor_field'):
+            columns.add(get_cursor_ordering(self.request, self, queryset)[0])
+        return queryset.only(*columns)
+
+
+class ConditionalGetMixin:
+    """
+    View mixin answering conditional GETs (``If-None-Match`` / ``If-Modified-Since``).
+
+    The validators come from one ``Max(updated_at)`` + ``Count(id)`` aggregate,
+    so a client polling an unchanged collection gets a 304 without a single
+    row being fetched or serialized. The row count makes deletes change the
+    ETag as well. ``updated_at`` is indexed on every model served this way,
+    so unfiltered lists read the maximum from the end of the index.
+    """
+    conditional_validators = None
+
+    def get_conditional_validators(self, queryset):
+        """
+        Compute the ETag and last modification time of a queryset.
+        """
+        aggregate = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        last_modified = aggregate['last_modified']
+        key = ':'.join([
+            queryset.model._meta.label,
+            str(aggregate['count']),
+            last_modified.isoformat() if last_modified else '',
+            self.request.get_full_path(),
+        ])
+        etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+        return etag, last_modified
+
+    def conditional_response(self, queryset, use_last_modified=False):
+        """
+        Get a 304 response when the client copy of the queryset is still fresh.
+
+        Last-Modified is only used when asked for: a delete does not move
+        ``Max(updated_at)`` of a collection, so lists are validated by ETag only.
+
+        Args:
+            queryset: The queryset the response is built from
+            use_last_modified (bool): Whether to also send and honour Last-Modified
+
+        Returns:
+            HttpResponseNotModified: The 304 response, or None if the body must be sent
+        """
+        etag, last_modified = self.get_conditional_validators(queryset)
+        if not use_last_modified:
+            last_modified = None
+        self.conditional_validators = (etag, last_modified)
+        return get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Attach the validators to successful and 304 responses.
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_validators and response.status_code in (200, 304):
+            etag, last_modified = self.conditional_validators
+            response.headers['ETag'] = etag
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
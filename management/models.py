@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 
@@ -17,6 +18,14 @@ class Member(models.Model):
     created_at = models.DateTimeField(_("creation time"), auto_now_add=True)
     updated_at = models.DateTimeField(_("update time"), auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['membership_end', 'id'], name='member_end_id_idx'),
+            models.Index(fields=['membership_start', 'id'], name='member_start_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='member_created_id_idx'),
+            models.Index(fields=['updated_at'], name='member_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
     
@@ -26,8 +35,17 @@ class MemberEntry(models.Model):
     Represents an entry record for a gym member.
     """
     member = models.ForeignKey(Member, on_delete=models.CASCADE)
-    entry_time = models.DateTimeField(auto_now_add=True)
+    entry_time = models.DateTimeField(default=timezone.now)
     exit_time = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(_("update time"), auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entry_time', 'id'], name='entry_time_id_idx'),
+            models.Index(fields=['member', 'entry_time'], name='entry_member_time_idx'),
+            models.Index(fields=['entry_time'], condition=models.Q(exit_time__isnull=True), name='entry_open_idx'),
+            models.Index(fields=['updated_at'], name='entry_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.member} - {self.entry_time}"
@@ -44,6 +62,12 @@ class Trainer(models.Model):
     created_at = models.DateTimeField(_("creation time"), auto_now_add=True)
     updated_at = models.DateTimeField(_("update time"), auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='trainer_created_id_idx'),
+            models.Index(fields=['updated_at'], name='trainer_updated_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -54,16 +78,41 @@ class GymClass(models.Model):
     """
     name = models.CharField(max_length=100)
     trainer = models.ForeignKey(Trainer, on_delete=models.CASCADE)
-    member = models.ForeignKey(Member, on_delete=models.CASCADE)
     start_time = models.TimeField()
     end_time = models.TimeField()
+    capacity = models.PositiveIntegerField(default=20)
+    # Denormalized number of Enrollment rows, kept in step by management.enrollments.
+    enrolled_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(_("creation time"), auto_now_add=True)
     updated_at = models.DateTimeField(_("update time"), auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='class_created_id_idx'),
+            models.Index(fields=['updated_at'], name='class_updated_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
 
+class Enrollment(models.Model):
+    """
+    Represents a member attending a gym class.
+    """
+    gym_class = models.ForeignKey(GymClass, on_delete=models.CASCADE, related_name='enrollments')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='enrollments')
+    created_at = models.DateTimeField(_("creation time"), auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['gym_class', 'member'], name='enrollment_class_member_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.member} - {self.gym_class}"
+
+
 class Payment(models.Model):
     """
     Represents a payment made by a gym member.
@@ -82,5 +131,57 @@ class Payment(models.Model):
     created_at = models.DateTimeField(_("creation time"), auto_now_add=True)
     updated_at = models.DateTimeField(_("update time"), auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+            models.Index(fields=['payment_method', 'payment_date'], name='payment_method_date_idx'),
+            models.Index(fields=['created_at', 'id'], name='payment_created_id_idx'),
+            models.Index(fields=['updated_at'], name='payment_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member} - {self.amount}"
+
+class MemberVisitSummary(models.Model):
+    """
+    Represents the visits of a gym member on one day, rolled up from archived entries.
+    """
+    member = models.ForeignKey(Member, on_delete=models.CASCADE)
+    day = models.DateField()
+    visits = models.PositiveIntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(_("update time"), auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'day'], name='visit_summary_member_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'id'], name='visit_summary_day_id_idx'),
+            models.Index(fields=['updated_at'], name='visit_summary_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member} - {self.day}"
+
+
+class DailyRevenue(models.Model):
+    """
+    Represents the payments received on one day with one payment method, maintained on every payment write.
+    """
+    day = models.DateField()
+    payment_method = models.CharField(max_length=50, choices=Payment.PAYMENT_METHOD)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(_("update time"), auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_method'], name='revenue_day_method_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='revenue_updated_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.member} - {self.amount}"
\ No newline at end of file
+        return f"{self.day} - {self.payment_method} - {self.total}"
@@ -0,0 +1,158 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MemberEntry
+
+
+def cache_key(db_name):
+    """
+    Get the cache key of the live occupancy counter of a gym database.
+    """
+    return f'occupancy:{db_name}'
+
+
+def reconciled_key(db_name):
+    """
+    Get the cache key holding when the counter was last reconciled.
+    """
+    return f'occupancy:{db_name}:reconciled'
+
+
+def count_open_entries(db_name):
+    """
+    Count the open entries of a gym, served by the ``exit_time IS NULL`` partial index.
+    """
+    return MemberEntry.objects.using(db_name).filter(exit_time__isnull=True).count()
+
+
+def reconcile(db_name):
+    """
+    Reset the live counter of a gym to the number of open entries.
+    """
+    count = count_open_entries(db_name)
+    cache.set_many({cache_key(db_name): count, reconciled_key(db_name): time.time()}, timeout=None)
+    return count
+
+
+def invalidate(db_name):
+    """
+    Drop the live counter of a gym so the next read reconciles it.
+    """
+    cache.delete_many([cache_key(db_name), reconciled_key(db_name)])
+
+
+def adjust(db_name, delta):
+    """
+    Move the live counter of a gym once the current transaction commits.
+
+    Args:
+        db_name (str): The gym database the entries were written to
+        delta (int): The change in the number of open entries
+    """
+    if not delta:
+        return
+
+    def apply():
+        try:
+            cache.incr(cache_key(db_name), delta)
+        except ValueError:
+            # Not counted yet: the next read reconciles from the database.
+            pass
+
+    transaction.on_commit(apply, using=db_name)
+
+
+def current(db_name):
+    """
+    Get the number of people in a gym right now.
+
+    The counter is read from the cache in constant time and reconciled
+    against the database once it is older than OCCUPANCY_RECONCILE_INTERVAL.
+    """
+    values = cache.get_many([cache_key(db_name), reconciled_key(db_name)])
+    count = values.get(cache_key(db_name))
+    reconciled = values.get(reconciled_key(db_name))
+    if count is None or reconciled is None or time.time() - reconciled > settings.OCCUPANCY_RECONCILE_INTERVAL:
+        return reconcile(db_name)
+    return max(count, 0)
+
+
+def hourly(db_name):
+    """
+    Break today's occupancy down by hour.
+
+    Returns:
+        list: One ``{"hour", "check_ins", "present"}`` item per hour of the day
+        so far, where ``present`` counts everybody inside at some point of the hour
+    """
+    now = timezone.localtime()
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    hours = now.hour + 1
+
+    intervals = (
+        MemberEntry.objects.using(db_name)
+        .filter(entry_time__lt=now)
+        .filter(Q(entry_time__gte=day_start) | Q(exit_time__isnull=True) | Q(exit_time__gte=day_start))
+        .values_list('entry_time', 'exit_time')
+    )
+
+    check_ins = [0] * hours
+    changes = [0] * (hours + 1)
+    for entry_time, exit_time in intervals:
+        first = max(int((entry_time - day_start) // timedelta(hours=1)), 0)
+        if entry_time >= day_start:
+            check_ins[first] += 1
+        last = hours - 1 if exit_time is None else min(int((exit_time - day_start) // timedelta(hours=1)), hours - 1)
+        if last >= first:
+            changes[first] += 1
+            changes[last + 1] -= 1
+
+    result = []
+    present = 0
+    for hour in range(hours):
+        present += changes[hour]
+        result.append({
+            'hour': (day_start + timedelta(hours=hour)).isoformat(),
+            'check_ins': check_ins[hour],
+            'present': present,
+        })
+    return result
+
+
+def close_stale_entries(db_name, cutoff, session_length, batch_size=1000):
+    """
+    Close the entries left open by members who skipped the exit scanner.
+
+    Entries opened before ``cutoff`` get ``exit_time = entry_time + session_length``.
+    Each batch is one ``UPDATE ... WHERE id IN (SELECT ... LIMIT batch_size)``
+    served by the open entry index, committed on its own so row locks are
+    held briefly.
+
+    Args:
+        db_name (str): The gym database to clean up
+        cutoff (datetime): Entries opened before this time are stale
+        session_length (timedelta): The visit length assumed for stale entries
+        batch_size (int): The maximum number of rows per UPDATE
+
+    Returns:
+        int: The number of entries closed
+    """
+    stale = MemberEntry.objects.using(db_name).filter(exit_time__isnull=True, entry_time__lt=cutoff)
+    closed = 0
+    while True:
+        with transaction.atomic(using=db_name):
+            batch = stale.order_by('entry_time').values('pk')[:batch_size]
+            count = MemberEntry.objects.using(db_name).filter(pk__in=batch, exit_time__isnull=True).update(
+                exit_time=F('entry_time') + session_length,
+                updated_at=timezone.now(),
+            )
+            adjust(db_name, -count)
+        closed += count
+        if count < batch_size:
+            return closed
@@ -0,0 +1,174 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def get_cursor_ordering(request, view, queryset=None):
+    """
+    Get the column a view pages on and its direction.
+
+    The first ``?ordering=`` term is used when the view has an OrderingFilter,
+    otherwise the view's ``cursor_field``, newest first.
+
+    Args:
+        request: The request object
+        view: The view being paginated
+        queryset: The queryset being paginated
+
+    Returns:
+        tuple: The field name and whether it is sorted descending
+    """
+    ordering = None
+    if OrderingFilter in getattr(view, 'filter_backends', ()):
+        ordering = OrderingFilter().get_ordering(request, queryset, view)
+    if ordering:
+        term = ordering[0]
+    else:
+        term = '-' + getattr(view, 'cursor_field', 'created_at')
+    return term.lstrip('-'), term.startswith('-')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination over a ``(cursor_field, id)`` position.
+
+    Pages are selected with a ``WHERE (field, id) < (value, id)`` style filter
+    instead of an OFFSET, so fetching a deep page costs the same as the first
+    one. Pagination is only applied when the client sends ``page_size`` or
+    ``cursor``; otherwise the view keeps returning the full collection.
+    The position column follows ``?ordering=`` when the view allows it, so a
+    filtered range read in index order is paged along that same index.
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of rows, or None when pagination was not requested.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.field, descending = get_cursor_ordering(request, view, queryset)
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        if cursor is None:
+            value, pk, self.reverse = None, None, False
+        else:
+            value, pk, self.reverse = cursor
+
+        # Walking backwards flips the order so the rows closest to the
+        # cursor come out of the index first.
+        if descending != self.reverse:
+            ordering = ('-' + self.field, '-id')
+            lookup = 'lt'
+        else:
+            ordering = (self.field, 'id')
+            lookup = 'gt'
+
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': value}) |
+                Q(**{self.field: value, f'id__{lookup}': pk})
+            )
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = cursor is not None
+            self.has_prev = has_more
+        else:
+            self.has_next = has_more
+            self.has_prev = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        """
+        Wrap a page in the ``{"data": ...}`` envelope with next/prev cursors.
+        """
+        return Response({
+            'data': data,
+            'next': self.get_next_cursor(),
+            'prev': self.get_prev_cursor(),
+        })
+
+    def is_requested(self, request):
+        """
+        Check whether the client opted into cursor pagination.
+        """
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        """
+        Get the requested page size, clamped to ``max_page_size``.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_cursor(self):
+        """
+        Get the cursor pointing past the last row of the current page.
+        """
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_prev_cursor(self):
+        """
+        Get the cursor pointing before the first row of the current page.
+        """
+        if not self.has_prev or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        """
+        Encode the position of a row into an opaque cursor string.
+        """
+        value = getattr(row, self.field)
+        position = {
+            'v': value.isoformat() if value is not None else None,
+            'id': getattr(row, 'id'),
+            'r': reverse,
+        }
+        payload = json.dumps(position, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the cursor sent by the client into ``(value, id, reverse)``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = position['v']
+            if value is not None:
+                value = model._meta.get_field(self.field).to_python(value)
+            return value, int(position['id']), bool(position['r'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
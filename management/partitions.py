@@ -0,0 +1,278 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import MemberEntry, MemberVisitSummary
+
+
+# Months of empty partitions kept ahead of the current one, so rows never
+# land in the default partition during normal operation.
+PARTITION_MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    """
+    Get the first day of the month ``count`` months after ``month``.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value):
+    """
+    Get the first day of the month of a date or datetime.
+    """
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month):
+    """
+    Get the name of the MemberEntry partition holding a month.
+    """
+    return f'{MemberEntry._meta.db_table}_p{month:%Y%m}'
+
+
+def default_partition_name():
+    """
+    Get the name of the partition catching rows outside every monthly range.
+    """
+    return f'{MemberEntry._meta.db_table}_default'
+
+
+def month_bound(month):
+    """
+    Get the UTC timestamp literal of the start of a month, as used in partition bounds.
+    """
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat(sep=' ')
+
+
+def is_supported(db_name):
+    """
+    Check whether the database of a gym can partition tables.
+    """
+    return connections[db_name].vendor == 'postgresql'
+
+
+def is_partitioned(db_name):
+    """
+    Check whether the MemberEntry table of a gym is already partitioned.
+    """
+    with connections[db_name].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [MemberEntry._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(db_name):
+    """
+    List the monthly partitions of the MemberEntry table of a gym.
+
+    Returns:
+        list: ``(month, table name)`` tuples, oldest first
+    """
+    table = MemberEntry._meta.db_table
+    with connections[db_name].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    prefix = f'{table}_p'
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((date(int(suffix[:4]), int(suffix[4:]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(db_name, month):
+    """
+    Create the partition of a month if it does not exist yet.
+
+    Returns:
+        bool: Whether the partition was created
+    """
+    connection = connections[db_name]
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(MemberEntry._meta.db_table)} "
+            f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(add_months(month, 1))}')"
+        )
+    return True
+
+
+def ensure_partitions(db_name, months_ahead=PARTITION_MONTHS_AHEAD, first_month=None):
+    """
+    Create the monthly partitions from ``first_month`` up to ``months_ahead`` months from now.
+
+    Returns:
+        list: The names of the partitions that were created
+    """
+    current = month_start(timezone.now())
+    month = first_month or current
+    created = []
+    while month <= add_months(current, months_ahead):
+        if create_partition(db_name, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def partition_table(db_name, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Convert the MemberEntry table of a gym into a table partitioned by month of ``entry_time``.
+
+    The rows are copied into a new partitioned table with one partition per
+    month and a default partition, then the old table is dropped and the
+    indexes, foreign key and id sequence are recreated under their original
+    names. PostgreSQL requires the primary key of a partitioned table to
+    include the partition column, so it becomes ``(id, entry_time)``; ids
+    keep coming from a single sequence and stay unique.
+
+    Writes to the table are blocked for the duration of the copy.
+
+    Args:
+        db_name (str): The gym database to convert
+        months_ahead (int): The number of future months to create partitions for
+
+    Returns:
+        int: The number of rows moved
+    """
+    connection = connections[db_name]
+    quote = connection.ops.quote_name
+    table = MemberEntry._meta.db_table
+    staging = f'{table}_partitioned'
+    sequence = f'{table}_id_seq'
+
+    with transaction.atomic(using=db_name), connection.schema_editor() as schema_editor:
+        schema_editor.execute(f"LOCK TABLE {quote(table)} IN EXCLUSIVE MODE")
+        schema_editor.execute(
+            f"CREATE TABLE {quote(staging)} (LIKE {quote(table)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({quote('entry_time')})"
+        )
+        schema_editor.execute(f"ALTER TABLE {quote(staging)} ADD PRIMARY KEY (id, entry_time)")
+        schema_editor.execute(f"CREATE TABLE {quote(default_partition_name())} PARTITION OF {quote(staging)} DEFAULT")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT min(entry_time), max(id) FROM {quote(table)}")
+            first_entry, last_id = cursor.fetchone()
+
+        # Partitions are named after the final table, which does not exist
+        # under that name yet, so they are created against the staging table.
+        current = month_start(timezone.now())
+        month = month_start(first_entry) if first_entry else current
+        while month <= add_months(current, months_ahead):
+            schema_editor.execute(
+                f"CREATE TABLE {quote(partition_name(month))} PARTITION OF {quote(staging)} "
+                f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(add_months(month, 1))}')"
+            )
+            month = add_months(month, 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {quote(staging)} SELECT * FROM {quote(table)}")
+            moved = cursor.rowcount
+
+        # Dropping the old table drops its indexes and identity sequence,
+        # freeing their names for the new table.
+        schema_editor.execute(f"DROP TABLE {quote(table)}")
+        schema_editor.execute(f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}")
+        schema_editor.execute(f"ALTER INDEX {quote(staging + '_pkey')} RENAME TO {quote(table + '_pkey')}")
+
+        schema_editor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.id")
+        schema_editor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        schema_editor.execute(f"SELECT setval('{sequence}', %s, %s)", (last_id or 1, last_id is not None))
+
+        for sql in schema_editor._model_indexes_sql(MemberEntry):
+            schema_editor.execute(sql)
+        member = MemberEntry._meta.get_field('member')
+        schema_editor.execute(schema_editor._create_fk_sql(MemberEntry, member, '_fk_%(to_table)s_%(to_column)s'))
+
+    return moved
+
+
+def archive_partition(db_name, month, drop=True):
+    """
+    Roll a monthly partition into daily visit summaries and remove it from MemberEntry.
+
+    Visits are counted per member and local day; minutes only count entries
+    that were closed. Summaries are added to existing ones, because a local
+    day can straddle two monthly partitions. The rollup and the detach run in
+    one transaction, so a partition is never counted twice.
+
+    Args:
+        db_name (str): The gym database to archive
+        month (date): The first day of the month to archive
+        drop (bool): Whether to drop the partition or keep it as a standalone table
+
+    Returns:
+        int: The number of summary rows written
+    """
+    connection = connections[db_name]
+    quote = connection.ops.quote_name
+    name = partition_name(month)
+    summary_table = MemberVisitSummary._meta.db_table
+
+    with transaction.atomic(using=db_name), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {quote(summary_table)} (member_id, day, visits, minutes, updated_at)
+            SELECT member_id,
+                   (entry_time AT TIME ZONE %s)::date,
+                   count(*),
+                   coalesce(sum(extract(epoch FROM exit_time - entry_time))::bigint / 60, 0),
+                   now()
+            FROM {quote(name)}
+            GROUP BY 1, 2
+            ON CONFLICT (member_id, day) DO UPDATE
+            SET visits = {quote(summary_table)}.visits + EXCLUDED.visits,
+                minutes = {quote(summary_table)}.minutes + EXCLUDED.minutes,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [settings.TIME_ZONE],
+        )
+        summarised = cursor.rowcount
+        cursor.execute(f"ALTER TABLE {quote(MemberEntry._meta.db_table)} DETACH PARTITION {quote(name)}")
+        if drop:
+            cursor.execute(f"DROP TABLE {quote(name)}")
+    return summarised
+
+
+def archive_partitions(db_name, older_than, drop=True):
+    """
+    Archive every monthly partition that ended more than ``older_than`` months ago.
+
+    Partitions still holding open entries are skipped, so nobody inside the
+    gym is archived; those are picked up by a later run once closed.
+
+    Returns:
+        list: ``(partition name, summary rows, skipped)`` tuples
+    """
+    cutoff = add_months(month_start(timezone.now()), -older_than)
+    results = []
+    for month, name in list_partitions(db_name):
+        if add_months(month, 1) > cutoff:
+            break
+        with connections[db_name].cursor() as cursor:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {connections[db_name].ops.quote_name(name)} WHERE exit_time IS NULL)")
+            has_open = cursor.fetchone()[0]
+        if has_open:
+            results.append((name, 0, True))
+            continue
+        results.append((name, archive_partition(db_name, month, drop=drop), False))
+    return results
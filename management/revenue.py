@@ -0,0 +1,172 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailyRevenue, Payment
+
+
+GROUP_DAY = 'day'
+GROUP_WEEK = 'week'
+GROUP_MONTH = 'month'
+GROUPS = (GROUP_DAY, GROUP_WEEK, GROUP_MONTH)
+
+
+def payment_key(payment):
+    """
+    Get the rollup row a payment is counted in.
+    """
+    return payment.payment_date, payment.payment_method
+
+
+def collect(payments, sign=1):
+    """
+    Sum the amount and number of payments per rollup row.
+
+    Args:
+        payments (iterable): Payment instances or ``(day, method, amount)`` tuples
+        sign (int): 1 to add the payments, -1 to remove them
+
+    Returns:
+        dict: ``[total, count]`` changes keyed by ``(day, payment_method)``
+    """
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for payment in payments:
+        if isinstance(payment, Payment):
+            day, method, amount = payment.payment_date, payment.payment_method, payment.amount
+        else:
+            day, method, amount = payment
+        deltas[(day, method)][0] += sign * Decimal(amount)
+        deltas[(day, method)][1] += sign
+    return deltas
+
+
+def merge(*deltas):
+    """
+    Add several sets of rollup changes together.
+    """
+    merged = defaultdict(lambda: [Decimal(0), 0])
+    for changes in deltas:
+        for key, (total, count) in changes.items():
+            merged[key][0] += total
+            merged[key][1] += count
+    return merged
+
+
+def apply(db_name, deltas):
+    """
+    Apply rollup changes with atomic ``F()`` increments.
+
+    Must run inside the transaction writing the payments, so the rollup and
+    the payments commit or roll back together. A missing row is created; if a
+    concurrent transaction created it first, the increment is retried.
+
+    Args:
+        db_name (str): The gym database of the payments
+        deltas (dict): ``[total, count]`` changes keyed by ``(day, payment_method)``
+    """
+    now = timezone.now()
+    rollups = DailyRevenue.objects.using(db_name)
+    for (day, method), (total, count) in sorted(deltas.items()):
+        if not total and not count:
+            continue
+        changes = {'total': F('total') + total, 'count': F('count') + count, 'updated_at': now}
+        if rollups.filter(day=day, payment_method=method).update(**changes):
+            continue
+        try:
+            with transaction.atomic(using=db_name):
+                rollups.create(day=day, payment_method=method, total=total, count=count)
+        except IntegrityError:
+            rollups.filter(day=day, payment_method=method).update(**changes)
+
+
+def record_created(db_name, payments):
+    """
+    Count new payments in the rollup.
+    """
+    apply(db_name, collect(payments))
+
+
+def record_deleted(db_name, payments):
+    """
+    Remove deleted payments from the rollup.
+    """
+    apply(db_name, collect(payments, sign=-1))
+
+
+def record_deleted_queryset(db_name, queryset):
+    """
+    Remove the payments of a queryset about to be deleted, e.g. by a member cascade.
+    """
+    grouped = queryset.order_by().values('payment_date', 'payment_method').annotate(total=Sum('amount'), count=Count('id'))
+    apply(db_name, {
+        (row['payment_date'], row['payment_method']): [-row['total'], -row['count']]
+        for row in grouped
+    })
+
+
+def rebuild(db_name):
+    """
+    Recompute the whole rollup of a gym from its payments.
+
+    On PostgreSQL the rollup table is locked against writes before the
+    payments are read: a payment write either commits before the read, and is
+    counted, or waits for the rebuild to commit before applying its increment.
+
+    Returns:
+        int: The number of rollup rows written
+    """
+    with transaction.atomic(using=db_name):
+        connection = connections[db_name]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {connection.ops.quote_name(DailyRevenue._meta.db_table)} IN EXCLUSIVE MODE')
+        grouped = Payment.objects.using(db_name).order_by().values('payment_date', 'payment_method').annotate(total=Sum('amount'), count=Count('id'))
+        rows = [
+            DailyRevenue(day=row['payment_date'], payment_method=row['payment_method'], total=row['total'], count=row['count'])
+            for row in grouped
+        ]
+        DailyRevenue.objects.using(db_name).all().delete()
+        DailyRevenue.objects.using(db_name).bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def summarize(queryset, group=GROUP_DAY):
+    """
+    Group rollup rows by day, week or month.
+
+    Args:
+        queryset: The DailyRevenue rows to summarize, already filtered by date
+        group (str): One of ``GROUPS``
+
+    Returns:
+        list: ``{"period", "total", "count", "methods"}`` items, oldest first,
+        where ``methods`` holds the total and count of each payment method
+    """
+    if group == GROUP_WEEK:
+        queryset = queryset.annotate(period=TruncWeek('day'))
+    elif group == GROUP_MONTH:
+        queryset = queryset.annotate(period=TruncMonth('day'))
+    else:
+        queryset = queryset.annotate(period=F('day'))
+
+    rows = (
+        queryset.order_by()
+        .values('period', 'payment_method')
+        .annotate(total=Sum('total'), count=Sum('count'))
+        .filter(count__gt=0)
+        .order_by('period', 'payment_method')
+    )
+
+    periods = {}
+    for row in rows:
+        period = periods.setdefault(row['period'], {'period': row['period'].isoformat(), 'total': Decimal(0), 'count': 0, 'methods': {}})
+        period['total'] += row['total']
+        period['count'] += row['count']
+        period['methods'][row['payment_method']] = {'total': f"{row['total']:.2f}", 'count': row['count']}
+    for period in periods.values():
+        period['total'] = f"{period['total']:.2f}"
+    return list(periods.values())
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+
+from gym.caching import LRUCache
+
+from .models import GymClass
+
+
+class TrainerSchedule:
+    """
+    Sorted interval index of the classes of one trainer.
+
+    Classes are sorted by start time next to the running maximum of their end
+    times: the classes that can overlap ``[start, end)`` all start before
+    ``end`` (one bisect), and walking back from there stops as soon as no
+    earlier class ends after ``start``.
+    """
+    def __init__(self, rows):
+        self.classes = sorted((start, end, name, pk) for pk, name, start, end in rows)
+        self.starts = [gym_class[0] for gym_class in self.classes]
+        self.max_ends = list(itertools.accumulate((gym_class[1] for gym_class in self.classes), max))
+
+    def find_conflict(self, start, end, exclude=None):
+        """
+        Find a class overlapping ``[start, end)``.
+
+        Args:
+            start (time): Its start time
+            end (time): Its end time
+            exclude (int): The id of the row being updated, if any
+
+        Returns:
+            tuple: The ``(start, end, name)`` of an overlapping class, or None
+        """
+        index = bisect_left(self.starts, end) - 1
+        while index >= 0 and self.max_ends[index] > start:
+            class_start, class_end, class_name, pk = self.classes[index]
+            if class_end > start and pk != exclude:
+                return class_start, class_end, class_name
+            index -= 1
+        return None
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_name):
+    """
+    Get the schedule cache of a gym database, creating it on first use.
+    """
+    with _caches_lock:
+        if db_name not in _caches:
+            _caches[db_name] = LRUCache(settings.SCHEDULE_CACHE_SIZE, settings.SCHEDULE_CACHE_TTL)
+        return _caches[db_name]
+
+
+def get_schedule(db_name, trainer_id):
+    """
+    Get the interval index of a trainer, loading it with one query on a miss.
+    """
+    cache = get_cache(db_name)
+    schedule = cache.get(trainer_id)
+    if schedule is None:
+        rows = GymClass.objects.using(db_name).filter(trainer_id=trainer_id).values_list('id', 'name', 'start_time', 'end_time')
+        schedule = TrainerSchedule(rows)
+        cache.set(trainer_id, schedule)
+    return schedule
+
+
+def load_schedules(db_name, trainer_ids):
+    """
+    Read the interval indexes of some trainers with one query, bypassing the cache.
+
+    Returns:
+        dict: The schedule of each trainer, by trainer id
+    """
+    rows = {trainer_id: [] for trainer_id in trainer_ids}
+    classes = GymClass.objects.using(db_name).filter(trainer_id__in=rows).values_list('trainer_id', 'id', 'name', 'start_time', 'end_time')
+    for trainer_id, *row in classes:
+        rows[trainer_id].append(row)
+    return {trainer_id: TrainerSchedule(trainer_rows) for trainer_id, trainer_rows in rows.items()}
+
+
+def invalidate(db_name, trainer_ids=None):
+    """
+    Drop the cached schedules of some trainers, or of all of them, once the current transaction commits.
+    """
+    if trainer_ids is None:
+        transaction.on_commit(lambda: get_cache(db_name).clear(), using=db_name)
+        return
+    trainer_ids = list(trainer_ids)
+    if trainer_ids:
+        transaction.on_commit(lambda: get_cache(db_name).delete_many(trainer_ids), using=db_name)
+
+
+def find_overlaps(rows):
+    """
+    Find every pair of overlapping classes of the same trainer.
+
+    Classes are sorted by trainer and start time, then swept once with a
+    heap of the end times of the classes still running, so the cost is
+    O(n log n) plus the number of overlaps reported.
+
+    Args:
+        rows (iterable): ``(trainer_id, id, name, start_time, end_time)`` tuples
+
+    Returns:
+        list: ``{"trainer_id", "sessions"}`` items, each holding two overlapping
+        classes with the ids of their rows
+    """
+    overlaps = []
+    running = []
+    current_trainer = None
+    for trainer_id, start, end, name, pk in sorted((trainer_id, start, end, name, pk) for trainer_id, pk, name, start, end in rows):
+        if trainer_id != current_trainer:
+            current_trainer = trainer_id
+            running = []
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for _, _, other in running:
+            overlaps.append({
+                'trainer_id': trainer_id,
+                'sessions': [describe(*other), describe(start, end, name, [pk])],
+            })
+        heapq.heappush(running, (end, pk, (start, end, name, [pk])))
+    return overlaps
+
+
+def describe(start, end, name, pks):
+    """
+    Represent a class in the conflicts report.
+    """
+    return {
+        'name': name,
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+        'class_ids': sorted(pks),
+    }
@@ -0,0 +1,71 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Lower
+
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Text columns matched by prefix (case-insensitively) and, on PostgreSQL,
+# by trigram similarity. Their indexes live in migration 0003.
+TEXT_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def prefix_filter(term):
+    """
+    Match a term against the start of a name, the email or the phone number.
+    """
+    lowered = term.lower()
+    condition = Q(phone_number__startswith=term)
+    for field in TEXT_FIELDS:
+        condition |= Q(**{f'{field}_lower__startswith': lowered})
+    return condition
+
+
+def fuzzy_filter(term, vendor):
+    """
+    Loosely match a term against the names and the email.
+
+    PostgreSQL uses the ``%`` trigram operator, which is served by the GIN
+    trigram indexes. Other backends fall back to a substring match.
+    """
+    condition = Q()
+    for field in TEXT_FIELDS:
+        if vendor == 'postgresql':
+            condition |= Q(**{f'{field}__trigram_similar': term})
+        else:
+            condition |= Q(**{f'{field}_lower__contains': term.lower()})
+    return condition
+
+
+def search_members(queryset, query, limit=SEARCH_LIMIT):
+    """
+    Search members by name, email or phone number prefix, with fuzzy matching.
+
+    Every whitespace separated term must match. Prefix matches rank first,
+    then rows are ordered by their best trigram similarity to the query.
+
+    Args:
+        queryset: The members queryset of a gym database
+        query (str): The text typed by the user
+        limit (int): The maximum number of members to return
+
+    Returns:
+        QuerySet: The ranked and limited members
+    """
+    vendor = connections[queryset.db].vendor
+    terms = query.split()
+
+    queryset = queryset.alias(**{f'{field}_lower': Lower(field) for field in TEXT_FIELDS})
+    prefix = Q()
+    matches = Q()
+    for term in terms:
+        prefix &= prefix_filter(term)
+        matches &= prefix_filter(term) | fuzzy_filter(term, vendor)
+
+    rank = Case(When(prefix, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+    if vendor == 'postgresql':
+        rank = rank + Greatest(*(TrigramSimilarity(field, query) for field in TEXT_FIELDS))
+
+    return queryset.filter(matches).annotate(rank=rank).order_by('-rank', 'last_name', 'first_name', 'id')[:limit]
@@ -1,8 +1,326 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Member, Trainer, GymClass, Payment, MemberEntry
+from . import memberships, occupancy, revenue, schedules
+from .exceptions import ScheduleConflict
+from .ingest import CHECK_IN, CHECK_OUT
+from .models import Enrollment, Member, Trainer, GymClass, Payment, MemberEntry, MemberVisitSummary
 
 
-class MemberSerializer(serializers.Serializer):
+class DynamicFieldsMixin:
+    """
+    Serializer mixin taking an optional ``fields`` argument that limits the
+    output to the given field names.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    List serializer that validates every item on its own and writes the
+    valid ones with a single bulk_create.
+
+    Invalid items do not fail the whole request: their errors are collected
+    in ``item_errors`` as ``{"index": ..., "errors": ...}`` entries.
+    """
+    batch_size = 1000
+
+    def to_internal_value(self, data):
+        """
+        Validate each item independently, keeping the valid ones.
+        """
+        if not isinstance(data, list):
+            raise serializers.ValidationError({'non_field_errors': ['Expected a list of items.']})
+
+        # State shared by the items of this payload, see bulk_partial_update.
+        self._context = {**self.context, 'batch': {}}
+        if hasattr(self.child, 'bulk_validating'):
+            self.child.bulk_validating(data)
+
+        self.item_errors = []
+        valid = []
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.item_errors.append({'index': index, 'errors': exc.detail})
+
+        valid = self.check_unique_fields(valid)
+        valid = self.check_related_fields(valid)
+        self.item_errors.sort(key=lambda error: error['index'])
+        return [item for _, item in valid]
+
+    def check_unique_fields(self, valid):
+        """
+        Reject items repeating a unique value, in the payload or in the database.
+        """
+        db_name = self.context.get('db_name')
+        model = self.child.Meta.model
+        for field in getattr(self.child.Meta, 'unique_fields', ()):
+            values = {item[field] for _, item in valid if field in item}
+            existing = set(
+                model.objects.using(db_name).filter(**{f'{field}__in': values}).values_list(field, flat=True)
+            )
+            kept = []
+            for index, item in valid:
+                if item.get(field) in existing:
+                    self.item_errors.append({'index': index, 'errors': {field: [f'{model.__name__} with this {field} already exists.']}})
+                    continue
+                existing.add(item.get(field))
+                kept.append((index, item))
+            valid = kept
+        return valid
+
+    def check_related_fields(self, valid):
+        """
+        Reject items pointing at rows that do not exist, with one query per relation.
+        """
+        db_name = self.context.get('db_name')
+        for field, related_model in getattr(self.child.Meta, 'related_fields', {}).items():
+            ids = {item[field] for _, item in valid if field in item}
+            existing = set(
+                related_model.objects.using(db_name).filter(pk__in=ids).values_list('pk', flat=True)
+            )
+            kept = []
+            for index, item in valid:
+                if item.get(field) is not None and item[field] not in existing:
+                    self.item_errors.append({'index': index, 'errors': {field: [f'{related_model.__name__} does not exist.']}})
+                    continue
+                kept.append((index, item))
+            valid = kept
+        return valid
+
+    def create(self, validated_data):
+        """
+        Create all valid instances in one transaction with bulk_create.
+        """
+        db_name = self.context.get('db_name')
+        model = self.child.Meta.model
+        with transaction.atomic(using=db_name):
+            instances = model.objects.using(db_name).bulk_create(
+                [self.build_instance(model, item) for item in validated_data],
+                batch_size=self.batch_size,
+            )
+            if hasattr(self.child, 'bulk_created'):
+                self.child.bulk_created(instances)
+        return instances
+
+    def build_instance(self, model, item):
+        """
+        Build an unsaved instance from validated data.
+
+        Values of the serializer's ``Meta.extra_fields`` are not model fields:
+        they are set as plain attributes, for the ``bulk_created`` hook.
+        """
+        extra_fields = getattr(self.child.Meta, 'extra_fields', ())
+        instance = model(**{field: value for field, value in item.items() if field not in extra_fields})
+        for field in extra_fields:
+            setattr(instance, field, item.get(field))
+        return instance
+
+
+
+def apply_changes(instance, validated_data):
+    """
+    Assign validated values to an instance.
+
+    Args:
+        instance: The model instance to update
+        validated_data (dict): The validated values, keyed by field name
+
+    Returns:
+        list: The names of the fields whose value actually changed
+    """
+    changed = []
+    for field, value in validated_data.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
+
+
+def touched_fields(model, changed):
+    """
+    Get the columns to write for a set of changed fields, including ``updated_at``.
+    """
+    fields = list(changed)
+    if fields and any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        fields.append('updated_at')
+    return fields
+
+
+def save_changes(instance, changed, db_name):
+    """
+    Save only the changed columns of an instance.
+    """
+    if changed:
+        instance.save(using=db_name, update_fields=touched_fields(type(instance), changed))
+
+
+def bulk_partial_update(serializer_class, items, db_name, batch_size=1000):
+    """
+    Apply a list of ``{"id": ..., "changes": {...}}`` partial updates.
+
+    The rows are fetched with one query, each change set is validated with the
+    resource serializer, and the changed rows are written with a single
+    bulk_update over the union of the touched fields. Everything runs in one
+    transaction, so the ``bulk_locking`` hook can lock the rows the batch
+    depends on before it is validated. The item serializers share their
+    context, whose ``batch`` dictionary holds state across the items.
+
+    Args:
+        serializer_class: The serializer class of the resource
+        items (list): The updates sent by the client
+        db_name (str): The gym database to write to
+        batch_size (int): The number of rows per UPDATE statement
+
+    Returns:
+        tuple: The updated instances and the per-item errors
+    """
+    model = serializer_class.Meta.model
+    errors = []
+    requested = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int) or not isinstance(item.get('changes'), dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object with an integer "id" and a "changes" object.']}})
+            continue
+        requested.append((index, item))
+
+    context = {'db_name': db_name, 'bulk': True, 'batch': {}}
+    hooks = serializer_class(context=context)
+    updated = {}
+    with transaction.atomic(using=db_name):
+        instances = model.objects.using(db_name).in_bulk([item['id'] for _, item in requested])
+        if hasattr(hooks, 'bulk_locking'):
+            hooks.bulk_locking(list(instances.values()), [item['changes'] for _, item in requested])
+        if hasattr(hooks, 'bulk_updating'):
+            hooks.bulk_updating(list(instances.values()))
+
+        valid = []
+        for index, item in requested:
+            instance = instances.get(item['id'])
+            if instance is None:
+                errors.append({'index': index, 'errors': {'id': ['Not found.']}})
+                continue
+            serializer = serializer_class(instance, data=item['changes'], partial=True, context=context)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            valid.append((index, instance, serializer.validated_data))
+        valid = check_related_changes(serializer_class, valid, db_name, errors)
+        valid = check_unique_changes(serializer_class, valid, db_name, errors)
+
+        fields = set()
+        for index, instance, validated_data in valid:
+            changed = apply_changes(instance, validated_data)
+            if changed:
+                fields.update(changed)
+                updated[instance.pk] = instance
+
+        if updated:
+            update_fields = touched_fields(model, sorted(fields))
+            if 'updated_at' in update_fields:
+                now = timezone.now()
+                for instance in updated.values():
+                    instance.updated_at = now
+            model.objects.using(db_name).bulk_update(list(updated.values()), update_fields, batch_size=batch_size)
+            if hasattr(hooks, 'bulk_updated'):
+                hooks.bulk_updated(list(updated.values()))
+
+    errors.sort(key=lambda error: error['index'])
+    return list(updated.values()), errors
+
+
+def check_related_changes(serializer_class, valid, db_name, errors):
+    """
+    Reject updates pointing at rows that do not exist, with one query per relation.
+
+    Args:
+        serializer_class: The serializer class, whose ``Meta.related_fields`` are checked
+        valid (list): The ``(index, instance, validated_data)`` of the valid updates
+        db_name (str): The gym database
+        errors (list): The per-item errors, extended with the rejected updates
+
+    Returns:
+        list: The updates that were not rejected
+    """
+    for field, related_model in getattr(serializer_class.Meta, 'related_fields', {}).items():
+        ids = {data[field] for _, instance, data in valid if data.get(field) is not None and data[field] != getattr(instance, field)}
+        existing = set(related_model.objects.using(db_name).filter(pk__in=ids).values_list('pk', flat=True))
+        kept = []
+        for index, instance, data in valid:
+            if data.get(field) in ids and data[field] not in existing:
+                errors.append({'index': index, 'errors': {field: [f'{related_model.__name__} does not exist.']}})
+                continue
+            kept.append((index, instance, data))
+        valid = kept
+    return valid
+
+
+def check_unique_changes(serializer_class, valid, db_name, errors):
+    """
+    Reject updates setting a unique value that another row holds, in the database or earlier in the batch.
+
+    Args:
+        serializer_class: The serializer class, whose ``Meta.unique_fields`` are checked
+        valid (list): The ``(index, instance, validated_data)`` of the valid updates
+        db_name (str): The gym database
+        errors (list): The per-item errors, extended with the rejected updates
+
+    Returns:
+        list: The updates that were not rejected
+    """
+    model = serializer_class.Meta.model
+    for field in getattr(serializer_class.Meta, 'unique_fields', ()):
+        values = {data[field] for _, instance, data in valid if field in data and data[field] != getattr(instance, field)}
+        holders = dict(model.objects.using(db_name).filter(**{f'{field}__in': values}).values_list(field, 'pk'))
+        kept = []
+        for index, instance, data in valid:
+            if field in data and data[field] != getattr(instance, field):
+                if holders.get(data[field], instance.pk) != instance.pk:
+                    errors.append({'index': index, 'errors': {field: [f'{model.__name__} with this {field} already exists.']}})
+                    continue
+                holders[data[field]] = instance.pk
+            kept.append((index, instance, data))
+        valid = kept
+    return valid
+
+
+class MembershipCheckMixin:
+    """
+    Serializer mixin rejecting check-ins of members whose membership is not
+    active. Validity windows come from the in-process membership cache, so a
+    check-in of a recently seen member is validated without a query.
+    """
+    def check_membership(self, member_id, day):
+        """
+        Raise a validation error unless the member exists and their membership covers the day.
+        """
+        window = memberships.get_window(self.context.get('db_name'), member_id)
+        if window is None:
+            raise serializers.ValidationError({'member_id': ['Member does not exist.']})
+        if not memberships.is_active(window, day):
+            raise serializers.ValidationError({'member_id': [f'Membership is not active on {day.isoformat()}.']})
+
+    def bulk_validating(self, items):
+        """
+        Load the validity windows of every member of a bulk payload with one query.
+        """
+        member_ids = set()
+        for item in items:
+            try:
+                member_ids.add(int(item['member_id']))
+            except (TypeError, KeyError, ValueError):
+                pass
+        memberships.get_windows(self.context.get('db_name'), member_ids)
+
+
+class MemberSerializer(DynamicFieldsMixin, serializers.Serializer):
     """
     Serializer for Member model.
     """
@@ -16,31 +334,46 @@ class MemberSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
 
+    class Meta:
+        model = Member
+        list_serializer_class = BulkCreateListSerializer
+        unique_fields = ('email',)
+
     def create(self, validated_data):
         """
         Create a new Member instance.
         """
         db_name = self.context.get('db_name')
-        return Member.objects.using(db_name).create(**validated_data)
+        member = Member.objects.using(db_name).create(**validated_data)
+        memberships.invalidate(db_name, [member.pk])
+        return member
 
     def update(self, instance, validated_data):
         """
         Update an existing Member instance.
         """
         db_name = self.context.get('db_name')
-        
-        instance.first_name = validated_data.get('first_name', instance.first_name)
-        instance.last_name = validated_data.get('last_name', instance.last_name)
-        instance.email = validated_data.get('email', instance.email)
-        instance.phone_number = validated_data.get('phone_number', instance.phone_number)
-        instance.membership_start = validated_data.get('membership_start', instance.membership_start)
-        instance.membership_end = validated_data.get('membership_end', instance.membership_end)
 
-        instance.save(using=db_name)
+        changed = apply_changes(instance, validated_data)
+        save_changes(instance, changed, db_name)
+        if {'membership_start', 'membership_end'} & set(changed):
+            memberships.invalidate(db_name, [instance.pk])
         return instance
+
+    def bulk_created(self, instances):
+        """
+        Drop cached validity windows of ids reused by a bulk POST.
+        """
+        memberships.invalidate(self.context.get('db_name'), [member.pk for member in instances if member.pk])
+
+    def bulk_updated(self, instances):
+        """
+        Drop the cached validity windows of members changed by a batch PATCH.
+        """
+        memberships.invalidate(self.context.get('db_name'), [member.pk for member in instances])
     
 
-class MemberEntrySerializer(serializers.Serializer):
+class MemberEntrySerializer(MembershipCheckMixin, DynamicFieldsMixin, serializers.Serializer):
     """
     Serializer for MemberEntry model.
     """
@@ -49,28 +382,96 @@ class MemberEntrySerializer(serializers.Serializer):
     entry_time = serializers.DateTimeField(read_only=True)
     exit_time = serializers.DateTimeField(required=False, allow_null=True)
 
+    class Meta:
+        model = MemberEntry
+        list_serializer_class = BulkCreateListSerializer
+        related_fields = {'member_id': Member}
+
+    def validate(self, attrs):
+        """
+        Reject new entries of members whose membership is not active today.
+        """
+        if self.instance is None:
+            self.check_membership(attrs['member_id'], timezone.localdate())
+        return attrs
+
     def create(self, validated_data):
         """
         Create a new MemberEntry instance.
         """
         db_name = self.context.get('db_name')
-        return MemberEntry.objects.using(db_name).create(**validated_data)
+        entry = MemberEntry.objects.using(db_name).create(**validated_data)
+        if entry.exit_time is None:
+            occupancy.adjust(db_name, 1)
+        return entry
 
     def update(self, instance, validated_data):
         """
         Update an existing MemberEntry instance.
         """
         db_name = self.context.get('db_name')
-        
-        instance.member_id = validated_data.get('member_id', instance.member_id)
-        instance.exit_time = validated_data.get('exit_time', instance.exit_time)
 
-        instance.save(using=db_name)
+        was_open = instance.exit_time is None
+        changed = apply_changes(instance, validated_data)
+        save_changes(instance, changed, db_name)
+        occupancy.adjust(db_name, (instance.exit_time is None) - was_open)
         return instance
 
+    def bulk_created(self, instances):
+        """
+        Count the entries created by a bulk POST in the live occupancy.
+        """
+        occupancy.adjust(self.context.get('db_name'), sum(entry.exit_time is None for entry in instances))
+
+    def bulk_updated(self, instances):
+        """
+        Reconcile the live occupancy after a batch PATCH.
+        """
+        occupancy.invalidate(self.context.get('db_name'))
+
+
+class CheckinEventSerializer(MembershipCheckMixin, serializers.Serializer):
+    """
+    Serializer for turnstile check-in/check-out events.
+    """
+    DIRECTIONS = (
+        (CHECK_IN, 'In'),
+        (CHECK_OUT, 'Out'),
+    )
+
+    member_id = serializers.IntegerField()
+    direction = serializers.ChoiceField(choices=DIRECTIONS, default=CHECK_IN)
+    timestamp = serializers.DateTimeField(default=timezone.now)
+
+    class Meta:
+        model = MemberEntry
+        list_serializer_class = BulkCreateListSerializer
+        related_fields = {'member_id': Member}
+
+    def validate(self, attrs):
+        """
+        Reject check-ins of members whose membership is not active on the day of the event.
+        """
+        if attrs['direction'] == CHECK_IN:
+            self.check_membership(attrs['member_id'], timezone.localdate(attrs['timestamp']))
+        return attrs
+
 
+class MemberVisitSummarySerializer(DynamicFieldsMixin, serializers.Serializer):
+    """
+    Serializer for MemberVisitSummary model, read-only: summaries are written by the archive job.
+    """
+    id = serializers.IntegerField(read_only=True)
+    member_id = serializers.IntegerField(read_only=True)
+    day = serializers.DateField(read_only=True)
+    visits = serializers.IntegerField(read_only=True)
+    minutes = serializers.IntegerField(read_only=True)
 
-class TrainerSerializer(serializers.Serializer):
+    class Meta:
+        model = MemberVisitSummary
+
+
+class TrainerSerializer(DynamicFieldsMixin, serializers.Serializer):
     """
     Serializer for Trainer model.
     """
@@ -82,6 +483,11 @@ class TrainerSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
 
+    class Meta:
+        model = Trainer
+        list_serializer_class = BulkCreateListSerializer
+        unique_fields = ('email',)
+
     def create(self, validated_data):
         """
         Create a new Trainer instance.
@@ -94,36 +500,160 @@ class TrainerSerializer(serializers.Serializer):
         Update an existing Trainer instance.
         """
         db_name = self.context.get('db_name')
-        
-        instance.name = validated_data.get('name', instance.name)
-        instance.specialty = validated_data.get('specialty', instance.specialty)
-        instance.email = validated_data.get('email', instance.email)
-        instance.phone_number = validated_data.get('phone_number', instance.phone_number)
 
-        instance.save(using=db_name)
+        changed = apply_changes(instance, validated_data)
+        save_changes(instance, changed, db_name)
         return instance
 
 
-class GymClassSerializer(serializers.Serializer):
+class GymClassSerializer(DynamicFieldsMixin, serializers.Serializer):
     """
     Serializer for GymClass model.
     """
     id = serializers.IntegerField(read_only=True)
     name = serializers.CharField(max_length=100)
     trainer_id = serializers.IntegerField()
-    member_id = serializers.IntegerField()
+    # Member enrolled when the class is created; see EnrollmentCreateView afterwards.
+    member_id = serializers.IntegerField(required=False, allow_null=True, write_only=True)
     start_time = serializers.TimeField()
     end_time = serializers.TimeField()
+    capacity = serializers.IntegerField(min_value=0, required=False)
+    enrolled_count = serializers.IntegerField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
     
 
+    class Meta:
+        model = GymClass
+        list_serializer_class = BulkCreateListSerializer
+        related_fields = {'trainer_id': Trainer, 'member_id': Member}
+        extra_fields = ('member_id',)
+
+    def get_slot(self, attrs):
+        """
+        Get the trainer, name, start and end time a write results in.
+        """
+        return tuple(
+            attrs[field] if field in attrs else getattr(self.instance, field, None)
+            for field in ('trainer_id', 'name', 'start_time', 'end_time')
+        )
+
+    def find_conflict(self, attrs, schedule=None):
+        """
+        Find a class of the same trainer overlapping the written one in the schedule index.
+        """
+        trainer_id, _, start, end = self.get_slot(attrs)
+        if schedule is None:
+            schedule = schedules.get_schedule(self.context.get('db_name'), trainer_id)
+        return schedule.find_conflict(start, end, exclude=getattr(self.instance, 'pk', None))
+
+    def find_stored_conflict(self, attrs):
+        """
+        Find a class of the same trainer overlapping the written one with a query, bypassing the cache.
+        """
+        trainer_id, name, start, end = self.get_slot(attrs)
+        rows = GymClass.objects.using(self.context.get('db_name')).filter(
+            trainer_id=trainer_id, start_time__lt=end, end_time__gt=start,
+        ).values_list('id', 'name', 'start_time', 'end_time')
+        return self.find_conflict(attrs, schedules.TrainerSchedule(rows))
+
+    def conflict_message(self, conflict):
+        """
+        Describe a conflicting class.
+        """
+        start, end, name = conflict
+        return f'The trainer already has "{name}" from {start.isoformat()} to {end.isoformat()}.'
+
+    def validate(self, attrs):
+        """
+        Check the time range, and in batch writes the trainer's availability.
+
+        Single writes repeating a class of the trainer are rejected here;
+        other overlaps are checked under a lock by create/update and rejected
+        with a 409. Batch writes report conflicts as item errors, including
+        conflicts between items of the same batch.
+        """
+        trainer_id, name, start, end = self.get_slot(attrs)
+        if end <= start:
+            raise serializers.ValidationError({'end_time': ['End time must be after start time.']})
+
+        capacity = attrs.get('capacity', getattr(self.instance, 'capacity', GymClass._meta.get_field('capacity').default))
+        if self.instance is None and attrs.get('member_id') is not None:
+            # A member given on creation is the first enrollment.
+            if capacity < 1:
+                raise serializers.ValidationError({'capacity': ['The class has no room for the member.']})
+            attrs['enrolled_count'] = 1
+        elif self.instance is not None and 'member_id' in attrs:
+            raise serializers.ValidationError({'member_id': ['Members are enrolled through the enrollments endpoint.']})
+        elif self.instance is not None and capacity < self.instance.enrolled_count:
+            raise serializers.ValidationError({'capacity': [f'{self.instance.enrolled_count} members are already enrolled.']})
+
+        if self.parent is not None or self.context.get('bulk'):
+            batch = self.context.get('batch', {})
+            conflict = self.find_conflict(attrs, batch.get('schedules', {}).get(trainer_id))
+            pending = batch.setdefault('slots', {}).setdefault(trainer_id, [])
+            if conflict is None:
+                conflict = next((
+                    slot for slot in pending
+                    if slot[0] < end and start < slot[1]
+                ), None)
+            if conflict is not None:
+                raise serializers.ValidationError({'non_field_errors': [self.conflict_message(conflict)]}, code='conflict')
+            pending.append((start, end, name))
+        else:
+            duplicates = GymClass.objects.using(self.context.get('db_name')).filter(
+                trainer_id=trainer_id, name=name, start_time=start, end_time=end,
+            )
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({'non_field_errors': [self.conflict_message((start, end, name))]}, code='conflict')
+        return attrs
+
+    def bulk_locking(self, instances, changes):
+        """
+        Lock every trainer a batch PATCH touches, in id order, and read their schedules.
+
+        The items are then checked against the database rather than the
+        cache, and no other writer can book these trainers until the batch
+        is written.
+        """
+        trainer_ids = {gym_class.trainer_id for gym_class in instances}
+        for item in changes:
+            try:
+                trainer_ids.add(int(item['trainer_id']))
+            except (TypeError, KeyError, ValueError):
+                pass
+        db_name = self.context.get('db_name')
+        locked = Trainer.objects.using(db_name).select_for_update().filter(pk__in=trainer_ids).order_by('pk').values_list('pk', flat=True)
+        self.context['batch']['schedules'] = schedules.load_schedules(db_name, list(locked))
+
+    def check_availability(self, attrs):
+        """
+        Lock the trainer and reject the write with a 409 if it double-books them.
+
+        The cached schedule may miss classes booked by another process, so
+        the overlap is read from the database once the lock is held.
+        """
+        trainer_id = self.get_slot(attrs)[0]
+        db_name = self.context.get('db_name')
+        list(Trainer.objects.using(db_name).select_for_update().filter(pk=trainer_id).values_list('pk'))
+        conflict = self.find_stored_conflict(attrs)
+        if conflict is not None:
+            raise ScheduleConflict(self.conflict_message(conflict))
+
     def create(self, validated_data):
         """
         Create a new GymClass instance.
         """
         db_name = self.context.get('db_name')
-        gym_class = GymClass.objects.using(db_name).create(**validated_data)
+        with transaction.atomic(using=db_name):
+            self.check_availability(validated_data)
+            member_id = validated_data.pop('member_id', None)
+            gym_class = GymClass.objects.using(db_name).create(**validated_data)
+            if member_id is not None:
+                Enrollment.objects.using(db_name).create(gym_class=gym_class, member_id=member_id)
+            schedules.invalidate(db_name, [gym_class.trainer_id])
         return gym_class
 
 
@@ -133,18 +663,101 @@ class GymClassSerializer(serializers.Serializer):
         """
         db_name = self.context.get('db_name')
 
-        instance.name = validated_data.get('name', instance.name)
-        instance.trainer_id = validated_data.get('trainer_id', instance.trainer_id)
-        instance.member_id = validated_data.get('member_id', instance.member_id)
-        instance.start_time = validated_data.get('start_time', instance.start_time)
-        instance.end_time = validated_data.get('end_time', instance.end_time)
-        
-        instance.save(using=db_name)
+        previous_trainer_id = instance.trainer_id
+        with transaction.atomic(using=db_name):
+            self.check_availability(validated_data)
+            changed = apply_changes(instance, validated_data)
+            save_changes(instance, changed, db_name)
+            schedules.invalidate(db_name, {previous_trainer_id, instance.trainer_id})
         return instance
 
+    def bulk_created(self, instances):
+        """
+        Enroll the members given in a bulk POST and drop the cached schedules of the trainers booked.
+        """
+        db_name = self.context.get('db_name')
+        Enrollment.objects.using(db_name).bulk_create([
+            Enrollment(gym_class=gym_class, member_id=gym_class.member_id)
+            for gym_class in instances if gym_class.member_id is not None
+        ])
+        schedules.invalidate(db_name, {gym_class.trainer_id for gym_class in instances})
+
+    def bulk_updated(self, instances):
+        """
+        Drop every cached schedule after a batch PATCH, which may move classes between trainers.
+        """
+        schedules.invalidate(self.context.get('db_name'))
+
+
+
+class EnrollmentSerializer(serializers.Serializer):
+    """
+    Serializer for enrolling a member in a class.
+    """
+    member_id = serializers.IntegerField()
+    created_at = serializers.DateTimeField(read_only=True)
+
+    def validate_member_id(self, value):
+        """
+        Check that the member exists.
+        """
+        if not Member.objects.using(self.context.get('db_name')).filter(pk=value).exists():
+            raise serializers.ValidationError('Member does not exist.')
+        return value
+
+
+class RosterMemberSerializer(serializers.Serializer):
+    """
+    Serializer for a member on a class roster, read from their enrollment.
+    """
+    id = serializers.IntegerField(source='member.id', read_only=True)
+    first_name = serializers.CharField(source='member.first_name', read_only=True)
+    last_name = serializers.CharField(source='member.last_name', read_only=True)
+    email = serializers.EmailField(source='member.email', read_only=True)
+    phone_number = serializers.CharField(source='member.phone_number', read_only=True)
+    enrolled_at = serializers.DateTimeField(source='created_at', read_only=True)
+
+
+class GymClassRosterSerializer(GymClassSerializer):
+    """
+    Serializer for a gym class with its trainer and enrolled members.
+
+    Expects the trainer to be selected and the enrollments prefetched with
+    their members, see GymClassRosterView.
+    """
+    trainer_name = serializers.CharField(source='trainer.name', read_only=True)
+    members = RosterMemberSerializer(source='enrollments.all', many=True, read_only=True)
+
+
+class TimetableClassSerializer(serializers.Serializer):
+    """
+    Serializer for a class on a trainer timetable, with its enrolled members.
+    """
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    start_time = serializers.TimeField(read_only=True)
+    end_time = serializers.TimeField(read_only=True)
+    capacity = serializers.IntegerField(read_only=True)
+    enrolled_count = serializers.IntegerField(read_only=True)
+    members = RosterMemberSerializer(source='enrollments.all', many=True, read_only=True)
+
+
+class TrainerTimetableSerializer(serializers.Serializer):
+    """
+    Serializer for a trainer with their classes in start time order.
+
+    Expects the classes to be prefetched with their enrollments and members,
+    see TrainerTimetableMixin.
+    """
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    specialty = serializers.CharField(read_only=True)
+    email = serializers.EmailField(read_only=True)
+    phone_number = serializers.CharField(read_only=True)
+    classes = TimetableClassSerializer(source='gymclass_set.all', many=True, read_only=True)
 
 
-class PaymentSerializer(serializers.Serializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.Serializer):
     """
     Serializer for Payment model.
     """
@@ -156,23 +769,53 @@ class PaymentSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
 
+    # Fields the daily revenue rollup depends on.
+    ROLLUP_FIELDS = ('payment_date', 'payment_method', 'amount')
+
+    class Meta:
+        model = Payment
+        list_serializer_class = BulkCreateListSerializer
+        related_fields = {'member_id': Member}
+
     def create(self, validated_data):
         """
         Create a new Payment instance.
         """
         db_name = self.context.get('db_name')
-        return Payment.objects.using(db_name).create(**validated_data)
+        with transaction.atomic(using=db_name):
+            payment = Payment.objects.using(db_name).create(**validated_data)
+            revenue.record_created(db_name, [payment])
+        return payment
 
     def update(self, instance, validated_data):
         """
         Update an existing Payment instance.
         """
         db_name = self.context.get('db_name')
-        
-        instance.member_id = validated_data.get('member_id', instance.member_id)
-        instance.amount = validated_data.get('amount', instance.amount)
-        instance.payment_date = validated_data.get('payment_date', instance.payment_date)
-        instance.payment_method = validated_data.get('payment_method', instance.payment_method)
 
-        instance.save(using=db_name)
-        return instance
\ No newline at end of file
+        previous = revenue.collect([instance], sign=-1)
+        with transaction.atomic(using=db_name):
+            changed = apply_changes(instance, validated_data)
+            save_changes(instance, changed, db_name)
+            if set(changed) & set(self.ROLLUP_FIELDS):
+                revenue.apply(db_name, revenue.merge(previous, revenue.collect([instance])))
+        return instance
+
+    def bulk_created(self, instances):
+        """
+        Count the payments created by a bulk POST in the daily revenue rollup.
+        """
+        revenue.record_created(self.context.get('db_name'), instances)
+
+    def bulk_updating(self, instances):
+        """
+        Remember the rollup row of each payment before a batch PATCH changes it.
+        """
+        self.previous = {payment.pk: (payment.payment_date, payment.payment_method, payment.amount) for payment in instances}
+
+    def bulk_updated(self, instances):
+        """
+        Move the payments changed by a batch PATCH between daily revenue rollup rows.
+        """
+        previous = revenue.collect([self.previous[payment.pk] for payment in instances], sign=-1)
+        revenue.apply(self.context.get('db_name'), revenue.merge(previous, revenue.collect(instances)))
\ No newline at end of file
@@ -1,3 +1,631 @@
-from django.test import TestCase
+import io
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from . import enrollments, imports, ingest, memberships, revenue, schedules
+from .exceptions import ClassFull
+from .models import DailyRevenue, Enrollment, GymClass, Member, MemberEntry, Payment, Trainer
+from .readers import CompiledReader
+from .serializers import GymClassSerializer, MemberEntrySerializer, MemberSerializer, PaymentSerializer, TrainerSerializer
+
+
+TEST_DB = 'testgym_db'
+
+CREATED_AT = datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc)
+UPDATED_AT = datetime(2024, 3, 2, 18, 0, tzinfo=dt_timezone.utc)
+
+
+class CompiledReaderParityTests(SimpleTestCase):
+    """
+    The compiled read path must render exactly what the DRF serializers render.
+    """
+    def assert_parity(self, serializer_class, instance, fields=None):
+        reader = CompiledReader(serializer_class, fields=fields, extra=('id',))
+        row = tuple(getattr(instance, column) for column in reader.columns)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(reader.to_representation(row)),
+            renderer.render(serializer_class(instance, fields=fields).data),
+        )
+
+    def test_member(self):
+        member = Member(
+            id=1, first_name='Ada', last_name='Lovelace', email='ada@example.com', phone_number='555-0100',
+            membership_start=date(2024, 1, 1), membership_end=date(2024, 12, 31),
+            created_at=CREATED_AT, updated_at=UPDATED_AT,
+        )
+        self.assert_parity(MemberSerializer, member)
+        self.assert_parity(MemberSerializer, member, fields=('id', 'first_name', 'last_name', 'membership_end'))
+
+    def test_member_entry(self):
+        self.assert_parity(MemberEntrySerializer, MemberEntry(id=2, member_id=1, entry_time=CREATED_AT, exit_time=None))
+        self.assert_parity(MemberEntrySerializer, MemberEntry(id=3, member_id=1, entry_time=CREATED_AT, exit_time=UPDATED_AT))
+
+    def test_trainer(self):
+        trainer = Trainer(
+            id=4, name='Grace', specialty='Yoga', email='grace@example.com', phone_number='555-0101',
+            created_at=CREATED_AT, updated_at=UPDATED_AT,
+        )
+        self.assert_parity(TrainerSerializer, trainer)
+
+    def test_gym_class(self):
+        gym_class = GymClass(
+            id=5, name='Morning flow', trainer_id=4, start_time=time(7, 0), end_time=time(8, 15, 30),
+            created_at=CREATED_AT, updated_at=UPDATED_AT,
+        )
+        self.assert_parity(GymClassSerializer, gym_class)
+
+    def test_payment(self):
+        for amount in (Decimal('49.9'), Decimal('1200.00'), Decimal('0')):
+            payment = Payment(
+                id=6, member_id=1, amount=amount, payment_date=date(2024, 2, 29), payment_method=Payment.CASH,
+                created_at=CREATED_AT, updated_at=UPDATED_AT,
+            )
+            self.assert_parity(PaymentSerializer, payment)
+
+
+class TrainerTimetableQueryTests(TestCase):
+    """
+    Timetables must be loaded in a constant number of queries, whatever the number of trainers, classes and members.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        members = Member.objects.using(TEST_DB).bulk_create([
+            Member(
+                first_name=f'Member {index}', last_name='Test', email=f'member{index}@example.com', phone_number='555-0100',
+                membership_start=date(2024, 1, 1), membership_end=date(2030, 12, 31),
+            )
+            for index in range(4)
+        ])
+        cls.trainers = []
+        for index in range(3):
+            trainer = Trainer.objects.using(TEST_DB).create(
+                name=f'Trainer {index}', specialty='Yoga', email=f'trainer{index}@example.com', phone_number='555-0101',
+            )
+            cls.trainers.append(trainer)
+            for hour in (7, 18):
+                gym_class = GymClass.objects.using(TEST_DB).create(
+                    name=f'Class {hour}', trainer=trainer, start_time=time(hour), end_time=time(hour + 1), enrolled_count=len(members),
+                )
+                Enrollment.objects.using(TEST_DB).bulk_create([Enrollment(gym_class=gym_class, member=member) for member in members])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def test_all_trainers(self):
+        with self.assertNumQueries(3, using=TEST_DB):
+            response = self.client.get(reverse('trainer-timetable-list'), {'db_name': TEST_DB})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 3)
+        for trainer in response.data['data']:
+            self.assertEqual([gym_class['start_time'] for gym_class in trainer['classes']], ['07:00:00', '18:00:00'])
+            self.assertEqual([len(gym_class['members']) for gym_class in trainer['classes']], [4, 4])
+
+    def test_one_trainer(self):
+        trainer = self.trainers[1]
+        with self.assertNumQueries(3, using=TEST_DB):
+            response = self.client.get(reverse('trainer-timetable', args=[trainer.pk]), {'db_name': TEST_DB})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['name'], trainer.name)
+        self.assertEqual(len(response.data['data']['classes']), 2)
+
+
+
+def create_members(count, membership_end=date(2030, 12, 31)):
+    """
+    Create members in the test gym database.
+    """
+    return Member.objects.using(TEST_DB).bulk_create([
+        Member(
+            first_name=f'Member {index}', last_name='Test', email=f'member{index}@example.com', phone_number='555-0100',
+            membership_start=date(2024, 1, 1), membership_end=membership_end,
+        )
+        for index in range(count)
+    ])
+
+
+def api_url(name, *args):
+    """
+    Get the URL of an endpoint, targeting the test gym database.
+    """
+    return f'{reverse(name, args=args)}?db_name={TEST_DB}'
+
+
+class TrainerConflictTests(TestCase):
+    """
+    A trainer must never be booked in two overlapping classes.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainer = Trainer.objects.using(TEST_DB).create(
+            name='Grace', specialty='Yoga', email='grace@example.com', phone_number='555-0101',
+        )
+        cls.morning = GymClass.objects.using(TEST_DB).create(
+            name='Morning flow', trainer=cls.trainer, start_time=time(7), end_time=time(8),
+        )
+
+    def setUp(self):
+        schedules.get_cache(TEST_DB).clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def class_data(self, name, start, end):
+        return {'name': name, 'trainer_id': self.trainer.pk, 'start_time': start, 'end_time': end}
+
+    def test_overlap_is_rejected_with_409(self):
+        response = self.client.post(api_url('gym-class-list-create'), self.class_data('Stretch', '07:30', '08:30'), format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Morning flow', response.data['detail'])
+        self.assertEqual(GymClass.objects.using(TEST_DB).count(), 1)
+
+    def test_repeated_class_is_rejected_and_adjacent_slots_are_accepted(self):
+        response = self.client.post(api_url('gym-class-list-create'), self.class_data('Morning flow', '07:00', '08:00'), format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(api_url('gym-class-list-create'), self.class_data('Stretch', '08:00', '09:00'), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_repeated_classes_are_reported_as_conflicts(self):
+        GymClass.objects.using(TEST_DB).create(name='Morning flow', trainer=self.trainer, start_time=time(7), end_time=time(8))
+        response = self.client.get(reverse('gym-class-conflicts'), {'db_name': TEST_DB})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 1)
+        self.assertEqual(response.data['data'][0]['trainer_id'], self.trainer.pk)
+
+    def test_bulk_post_rejects_repeated_classes_within_the_batch(self):
+        response = self.client.post(api_url('gym-class-list-create'), [
+            self.class_data('Spin', '09:00', '10:00'),
+            self.class_data('Spin', '09:00', '10:00'),
+        ], format='json')
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+    def test_class_missing_from_the_cache_is_found_under_the_lock(self):
+        schedules.get_schedule(TEST_DB, self.trainer.pk)
+        # Booked by another process, whose invalidation never reaches this one.
+        GymClass.objects.using(TEST_DB).create(name='Pilates', trainer=self.trainer, start_time=time(10), end_time=time(11))
+        response = self.client.post(api_url('gym-class-list-create'), self.class_data('Stretch', '10:30', '11:30'), format='json')
+        self.assertEqual(response.status_code, 409)
+
+    def test_update_into_an_overlap_is_rejected_with_409(self):
+        evening = GymClass.objects.using(TEST_DB).create(name='Evening flow', trainer=self.trainer, start_time=time(18), end_time=time(19))
+        response = self.client.put(
+            api_url('gym-class-retrieve-update-destroy', evening.pk), {'start_time': '07:45', 'end_time': '08:45'}, format='json',
+        )
+        self.assertEqual(response.status_code, 409)
+        evening.refresh_from_db(using=TEST_DB)
+        self.assertEqual(evening.start_time, time(18))
+
+    def test_bulk_post_reports_conflicts_within_the_batch(self):
+        response = self.client.post(api_url('gym-class-list-create'), [
+            self.class_data('Spin', '09:00', '10:00'),
+            self.class_data('Boxing', '09:30', '10:30'),
+            self.class_data('Stretch', '07:30', '08:00'),
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['name'] for item in response.data['data']], ['Spin'])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+
+    def test_batch_patch_reports_conflicts_within_the_batch(self):
+        noon = GymClass.objects.using(TEST_DB).create(name='Noon', trainer=self.trainer, start_time=time(12), end_time=time(13))
+        late = GymClass.objects.using(TEST_DB).create(name='Late', trainer=self.trainer, start_time=time(20), end_time=time(21))
+        response = self.client.patch(api_url('gym-class-list-create'), [
+            {'id': noon.pk, 'changes': {'start_time': '16:00', 'end_time': '17:00'}},
+            {'id': late.pk, 'changes': {'start_time': '16:30', 'end_time': '17:30'}},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['data']], [noon.pk])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        late.refresh_from_db(using=TEST_DB)
+        self.assertEqual(late.start_time, time(20))
+
+
+class EnrollmentCapacityTests(TestCase):
+    """
+    Enrollments must never push a class over its capacity.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = create_members(3)
+        trainer = Trainer.objects.using(TEST_DB).create(
+            name='Grace', specialty='Yoga', email='grace@example.com', phone_number='555-0101',
+        )
+        cls.gym_class = GymClass.objects.using(TEST_DB).create(
+            name='Morning flow', trainer=trainer, start_time=time(7), end_time=time(8), capacity=2,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def enroll(self, member):
+        return self.client.post(api_url('gym-class-enrollment-create', self.gym_class.pk), {'member_id': member.pk}, format='json')
+
+    def enrolled_count(self):
+        return GymClass.objects.using(TEST_DB).values_list('enrolled_count', flat=True).get(pk=self.gym_class.pk)
+
+    def test_full_class_is_rejected_with_409(self):
+        self.assertEqual(self.enroll(self.members[0]).status_code, 201)
+        self.assertEqual(self.enroll(self.members[1]).status_code, 201)
+        self.assertEqual(self.enroll(self.members[2]).status_code, 409)
+        self.assertEqual(self.enrolled_count(), 2)
+        self.assertEqual(Enrollment.objects.using(TEST_DB).filter(gym_class=self.gym_class).count(), 2)
+
+    def test_duplicate_enrollment_gives_the_seat_back(self):
+        self.assertEqual(self.enroll(self.members[0]).status_code, 201)
+        self.assertEqual(self.enroll(self.members[0]).status_code, 409)
+        self.assertEqual(self.enrolled_count(), 1)
+
+    def test_unenrolling_frees_the_seat(self):
+        self.enroll(self.members[0])
+        self.enroll(self.members[1])
+        response = self.client.delete(api_url('gym-class-enrollment-destroy', self.gym_class.pk, self.members[1].pk))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.enroll(self.members[2]).status_code, 201)
+        self.assertEqual(self.enrolled_count(), 2)
+
+    def test_seat_is_taken_by_the_conditional_update_not_the_instance(self):
+        stale = GymClass.objects.using(TEST_DB).get(pk=self.gym_class.pk)
+        GymClass.objects.using(TEST_DB).filter(pk=self.gym_class.pk).update(enrolled_count=2)
+        self.assertEqual(stale.enrolled_count, 0)
+        with self.assertRaises(ClassFull):
+            enrollments.enroll(TEST_DB, stale.pk, self.members[0].pk)
+        self.assertFalse(Enrollment.objects.using(TEST_DB).exists())
+
+    def test_member_id_cannot_be_requested_as_a_field(self):
+        response = self.client.get(reverse('gym-class-list-create'), {'db_name': TEST_DB, 'fields': 'id,member_id'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_deleting_a_member_frees_their_seat_and_keeps_the_class(self):
+        self.enroll(self.members[0])
+        self.enroll(self.members[1])
+        response = self.client.delete(api_url('member-retrieve-update-destroy', self.members[0].pk))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.enrolled_count(), 1)
+        self.assertEqual(list(Enrollment.objects.using(TEST_DB).values_list('member_id', flat=True)), [self.members[1].pk])
+
+
+class RevenueRollupTests(TestCase):
+    """
+    The daily revenue rollup must always match what a rebuild from the payments gives.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = create_members(1)[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def payment_data(self, amount, day, method):
+        return {'member_id': self.member.pk, 'amount': amount, 'payment_date': day, 'payment_method': method}
+
+    def rollup(self):
+        return sorted(DailyRevenue.objects.using(TEST_DB).exclude(count=0).values_list('day', 'payment_method', 'total', 'count'))
+
+    def assert_rollup_matches_payments(self):
+        maintained = self.rollup()
+        revenue.rebuild(TEST_DB)
+        self.assertEqual(maintained, self.rollup())
+
+    def test_rollup_follows_every_kind_of_write(self):
+        response = self.client.post(api_url('payment-list-create'), self.payment_data('10.00', '2024-03-01', Payment.CASH), format='json')
+        self.assertEqual(response.status_code, 201)
+        first = response.data['id']
+        self.assert_rollup_matches_payments()
+
+        response = self.client.post(api_url('payment-list-create'), [
+            self.payment_data('5.50', '2024-03-01', Payment.ONLINE),
+            self.payment_data('20.00', '2024-03-02', Payment.CASH),
+        ], format='json')
+        second, third = [payment['id'] for payment in response.data['data']]
+        self.assert_rollup_matches_payments()
+
+        response = self.client.put(api_url('payment-retrieve-update-destroy', first), {'amount': '12.00', 'payment_method': Payment.ONLINE}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_rollup_matches_payments()
+
+        response = self.client.patch(api_url('payment-list-create'), [
+            {'id': second, 'changes': {'payment_date': '2024-03-02', 'payment_method': Payment.CASH}},
+        ], format='json')
+        self.assertEqual(response.data['errors'], [])
+        self.assert_rollup_matches_payments()
+
+        self.assertEqual(self.client.delete(api_url('payment-retrieve-update-destroy', third)).status_code, 204)
+        self.assert_rollup_matches_payments()
+
+        self.assertEqual(self.rollup(), [
+            (date(2024, 3, 1), Payment.ONLINE, Decimal('12.00'), 1),
+            (date(2024, 3, 2), Payment.CASH, Decimal('5.50'), 1),
+        ])
+
+    def test_batch_patch_rejects_unknown_members(self):
+        payment = Payment.objects.using(TEST_DB).create(
+            member=self.member, amount=Decimal('10.00'), payment_date=date(2024, 3, 1), payment_method=Payment.CASH,
+        )
+        response = self.client.patch(api_url('payment-list-create'), [
+            {'id': payment.pk, 'changes': {'member_id': 999999}},
+            {'id': payment.pk, 'changes': {'amount': '11.00'}},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['errors'], [{'index': 0, 'errors': {'member_id': ['Member does not exist.']}}])
+        payment.refresh_from_db(using=TEST_DB)
+        self.assertEqual((payment.member_id, payment.amount), (self.member.pk, Decimal('11.00')))
+
+    def test_summary_groups_the_rollup(self):
+        Payment.objects.using(TEST_DB).bulk_create([
+            Payment(member=self.member, amount=Decimal('12.00'), payment_date=date(2024, 3, 1), payment_method=Payment.ONLINE),
+            Payment(member=self.member, amount=Decimal('5.50'), payment_date=date(2024, 3, 30), payment_method=Payment.CASH),
+            Payment(member=self.member, amount=Decimal('7.00'), payment_date=date(2024, 4, 2), payment_method=Payment.CASH),
+        ])
+        revenue.rebuild(TEST_DB)
+        response = self.client.get(reverse('payment-summary'), {'db_name': TEST_DB, 'group': revenue.GROUP_MONTH, 'to': '2024-03-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], [{
+            'period': '2024-03-01',
+            'total': '17.50',
+            'count': 2,
+            'methods': {Payment.CASH: {'total': '5.50', 'count': 1}, Payment.ONLINE: {'total': '12.00', 'count': 1}},
+        }])
+
+
+class CheckinIngestTests(TestCase):
+    """
+    Turnstile events must be applied in arrival order, and a batch the database rejects must not block the buffer.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = create_members(3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def event(self, member, direction, minutes):
+        return {'member_id': member.pk, 'direction': direction, 'timestamp': CREATED_AT + timedelta(minutes=minutes)}
+
+    def entries(self, member):
+        return list(MemberEntry.objects.using(TEST_DB).filter(member=member).order_by('entry_time').values_list('entry_time', 'exit_time'))
+
+    def test_events_are_applied_in_arrival_order(self):
+        first, second = self.members[:2]
+        MemberEntry.objects.using(TEST_DB).create(member=second, entry_time=CREATED_AT - timedelta(hours=1))
+        opened, closed = ingest.write_events(TEST_DB, [
+            self.event(first, ingest.CHECK_IN, 0),
+            self.event(first, ingest.CHECK_OUT, 30),
+            self.event(second, ingest.CHECK_OUT, 40),
+            self.event(first, ingest.CHECK_IN, 60),
+        ])
+        self.assertEqual((opened, closed), (2, 1))
+        self.assertEqual(self.entries(first), [
+            (CREATED_AT, CREATED_AT + timedelta(minutes=30)),
+            (CREATED_AT + timedelta(minutes=60), None),
+        ])
+        self.assertEqual(self.entries(second), [(CREATED_AT - timedelta(hours=1), CREATED_AT + timedelta(minutes=40))])
+
+    def test_flush_writes_the_buffered_events(self):
+        buffer = ingest.CheckinBuffer(TEST_DB, batch_size=100, flush_interval=3600, max_attempts=2)
+        ticket = buffer.add([self.event(member, ingest.CHECK_IN, 0) for member in self.members])
+        self.assertFalse(buffer.wait(ticket, timeout=0))
+        buffer.flush()
+        self.assertTrue(buffer.wait(ticket, timeout=0))
+        self.assertEqual(MemberEntry.objects.using(TEST_DB).count(), 3)
+
+    def test_rejected_events_are_dropped_after_max_attempts(self):
+        rejected = self.members[1].pk
+        write_events = ingest.write_events
+
+        def reject_member(db_name, events):
+            if any(event['member_id'] == rejected for event in events):
+                raise IntegrityError('rejected')
+            return write_events(db_name, events)
+
+        buffer = ingest.CheckinBuffer(TEST_DB, batch_size=100, flush_interval=3600, max_attempts=2)
+        ticket = buffer.add([self.event(member, ingest.CHECK_IN, 0) for member in self.members])
+        with mock.patch.object(ingest, 'write_events', reject_member), self.assertLogs(ingest.logger, 'ERROR'):
+            with self.assertRaises(IntegrityError):
+                buffer.flush()
+            self.assertFalse(buffer.wait(ticket, timeout=0))
+            buffer.flush()
+        self.assertTrue(buffer.wait(ticket, timeout=0))
+        self.assertEqual([event['member_id'] for event in buffer.dropped(1, ticket)], [rejected])
+        self.assertEqual(
+            sorted(MemberEntry.objects.using(TEST_DB).values_list('member_id', flat=True)),
+            [self.members[0].pk, self.members[2].pk],
+        )
+
+    def test_events_stay_buffered_while_the_database_is_unreachable(self):
+        buffer = ingest.CheckinBuffer(TEST_DB, batch_size=100, flush_interval=3600, max_attempts=1)
+        ticket = buffer.add([self.event(self.members[0], ingest.CHECK_IN, 0)])
+        with mock.patch.object(ingest, 'write_events', side_effect=OperationalError('unreachable')), self.assertLogs(ingest.logger, 'ERROR'):
+            for _ in range(3):
+                with self.assertRaises(OperationalError):
+                    buffer.flush()
+        self.assertFalse(buffer.wait(ticket, timeout=0))
+        buffer.flush()
+        self.assertTrue(buffer.wait(ticket, timeout=0))
+        self.assertEqual(buffer.dropped(1, ticket), [])
+        self.assertEqual(MemberEntry.objects.using(TEST_DB).count(), 1)
+
+    def test_failed_flush_is_retried_by_the_timer_with_backoff(self):
+        buffer = ingest.CheckinBuffer(TEST_DB, batch_size=100, flush_interval=30, max_attempts=1)
+        ticket = buffer.add([self.event(self.members[0], ingest.CHECK_IN, 0)])
+        delays = []
+        with mock.patch.object(ingest, 'write_events', side_effect=OperationalError('unreachable')), self.assertLogs(ingest.logger, 'ERROR'):
+            for _ in range(3):
+                with self.assertRaises(OperationalError):
+                    buffer.flush()
+                delays.append(buffer.timer.interval)
+        self.assertEqual(delays, [30, 60, buffer.max_retry_delay])
+        buffer.flush()
+        self.assertIsNone(buffer.timer)
+        self.assertTrue(buffer.wait(ticket, timeout=0))
+
+    def test_waiting_caller_gets_the_written_events(self):
+        response = self.client.post(
+            f"{api_url('member-entry-ingest')}&wait=true",
+            [{'member_id': member.pk} for member in self.members[:2]],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['flushed'])
+        self.assertEqual(response.data['dropped'], [])
+        self.assertEqual(MemberEntry.objects.using(TEST_DB).filter(exit_time__isnull=True).count(), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Following the cursors must visit every row exactly once, in order, both ways.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        # Pairs of members share a membership end, so pages split ties on id.
+        cls.members = Member.objects.using(TEST_DB).bulk_create([
+            Member(
+                first_name=f'Member {index}', last_name='Test', email=f'member{index}@example.com', phone_number='555-0100',
+                membership_start=date(2024, 1, 1), membership_end=date(2025, 1, 1 + index // 2),
+            )
+            for index in range(7)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+
+    def get_page(self, ordering, cursor=None):
+        params = {'db_name': TEST_DB, 'ordering': ordering, 'page_size': 3, 'fields': 'id'}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(reverse('member-list-create'), params)
+        self.assertEqual(response.status_code, 200)
+        return [member['id'] for member in response.data['data']], response.data['next'], response.data['prev']
+
+    def assert_round_trip(self, ordering, expected):
+        pages = []
+        ids, cursor, prev = self.get_page(ordering)
+        self.assertIsNone(prev)
+        pages.append(ids)
+        while cursor:
+            ids, cursor, prev = self.get_page(ordering, cursor)
+            pages.append(ids)
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        for page in reversed(pages[:-1]):
+            ids, _, prev = self.get_page(ordering, prev)
+            self.assertEqual(ids, page)
+        self.assertIsNone(prev)
+
+    def test_ascending_round_trip(self):
+        expected = [member.pk for member in sorted(self.members, key=lambda member: (member.membership_end, member.pk))]
+        self.assert_round_trip('membership_end', expected)
+
+    def test_descending_round_trip(self):
+        expected = [member.pk for member in sorted(self.members, key=lambda member: (member.membership_end, member.pk), reverse=True)]
+        self.assert_round_trip('-membership_end', expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('member-list-create'), {'db_name': TEST_DB, 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class MembershipCacheTests(TestCase):
+    """
+    Check-ins are validated against cached membership windows, which every membership change must drop.
+    """
+    databases = {TEST_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = create_members(1)[0]
+
+    def setUp(self):
+        memberships.get_cache(TEST_DB).clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(email='staff@example.com', is_staff=True))
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+
+    def check_in(self):
+        return self.client.post(api_url('member-entry-list-create'), {'member_id': self.member.pk}, format='json')
+
+    def test_cached_window_is_read_without_a_query(self):
+        memberships.get_window(TEST_DB, self.member.pk)
+        with self.assertNumQueries(0, using=TEST_DB):
+            window = memberships.get_window(TEST_DB, self.member.pk)
+        self.assertEqual(window, (self.member.membership_start, self.member.membership_end))
+
+    def test_expired_membership_is_rejected(self):
+        Member.objects.using(TEST_DB).filter(pk=self.member.pk).update(membership_end=self.yesterday)
+        response = self.check_in()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('member_id', response.data)
+
+    def test_update_drops_the_cached_window(self):
+        self.assertEqual(self.check_in().status_code, 201)
+        with self.captureOnCommitCallbacks(using=TEST_DB, execute=True):
+            response = self.client.put(
+                api_url('member-retrieve-update-destroy', self.member.pk), {'membership_end': self.yesterday.isoformat()}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.check_in().status_code, 400)
+
+    def test_batch_patch_drops_the_cached_windows(self):
+        self.assertEqual(self.check_in().status_code, 201)
+        with self.captureOnCommitCallbacks(using=TEST_DB, execute=True):
+            response = self.client.patch(
+                api_url('member-list-create'), [{'id': self.member.pk, 'changes': {'membership_end': self.yesterday.isoformat()}}], format='json',
+            )
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(self.check_in().status_code, 400)
+
+    def test_unrelated_update_keeps_the_cached_window(self):
+        memberships.get_window(TEST_DB, self.member.pk)
+        with self.captureOnCommitCallbacks(using=TEST_DB, execute=True):
+            self.client.put(api_url('member-retrieve-update-destroy', self.member.pk), {'first_name': 'Ada'}, format='json')
+        with self.assertNumQueries(0, using=TEST_DB):
+            memberships.get_window(TEST_DB, self.member.pk)
+
+
+class CsvImportTests(TestCase):
+    """
+    Rejected rows are reported with the file line they are on, even after quoted multi-line fields.
+    """
+    databases = {TEST_DB}
+
+    def test_rejected_rows_are_reported_with_their_line(self):
+        file = io.StringIO(
+            'first_name,last_name,email,phone_number,membership_start,membership_end\n'
+            'Ada,"Love\nlace",ada@example.com,555-0100,2024-01-01,2024-12-31\n'
+            'Grace,Hopper,not-an-email,555-0101,2024-01-01,2024-12-31\n'
+            'Alan,Turing,alan@example.com,555-0102,2024-01-01,2024-12-31\n'
+            'Edsger,Dijkstra,ada@example.com,555-0103,2024-01-01,2024-12-31\n'
+        )
+        rejected = []
+        result = imports.import_csv(
+            TEST_DB, 'members', file, chunk_size=2, on_error=lambda line, row, errors: rejected.append((line, row['first_name'])),
+        )
+
+        self.assertEqual(result, {'imported': 2, 'rejected': 2})
+        self.assertEqual(rejected, [(4, 'Grace'), (6, 'Edsger')])
+        self.assertEqual(Member.objects.using(TEST_DB).get(email='ada@example.com').last_name, 'Love\nlace')
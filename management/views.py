@@ -1,50 +1,175 @@
+import io
+
 from rest_framework import viewsets
-from .models import GymClass, Member, MemberEntry, Payment, Trainer
+from rest_framework.views import APIView
+from .models import DailyRevenue, Enrollment, GymClass, Member, MemberEntry, MemberVisitSummary, Payment, Trainer
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework.permissions import IsAuthenticated
-from .serializers import GymClassSerializer, MemberEntrySerializer, MemberSerializer, PaymentSerializer, TrainerSerializer
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from django.db.models import Prefetch
+from . import enrollments, memberships, occupancy, revenue, schedules
+from .ingest import get_buffer
+from .serializers import CheckinEventSerializer, EnrollmentSerializer, GymClassRosterSerializer, GymClassSerializer, MemberEntrySerializer, MemberSerializer, MemberVisitSummarySerializer, PaymentSerializer, TrainerSerializer, TrainerTimetableSerializer, bulk_partial_update
 from rest_framework import generics, mixins
 from rest_framework.response import Response
 from rest_framework import generics, status
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from accounts.tenants import get_db_name
+from .mixins import ConditionalGetMixin, SparseFieldsMixin
+from .filters import RangeFilterBackend
+from .exports import get_export_format, stream_export
+from .forecast import FORECAST_DAYS, MAX_FORECAST_DAYS, forecast
+from .imports import IMPORT_SERIALIZERS, import_csv
+from .pagination import KeysetPagination
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search_members
+
+
+def bulk_create_response(serializer_class, data, db_name):
+    """
+    Validate a list of items and create the valid ones with bulk_create.
+
+    Args:
+        serializer_class: The serializer class of the resource
+        data (list): The items sent by the client
+        db_name (str): The gym database to write to
+
+    Returns:
+        Response: The created items and the per-item errors
+    """
+    serializer = serializer_class(data=data, many=True, context={'db_name': db_name})
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    created = serializer.data
+    response_status = status.HTTP_201_CREATED if created or not serializer.item_errors else status.HTTP_400_BAD_REQUEST
+    return Response({"data": created, "errors": serializer.item_errors}, status=response_status)
+
+
+def bulk_update_response(serializer_class, data, db_name):
+    """
+    Apply a batch of partial updates and report the per-item errors.
+
+    Args:
+        serializer_class: The serializer class of the resource
+        data (list): The ``{"id": ..., "changes": {...}}`` items sent by the client
+        db_name (str): The gym database to write to
+
+    Returns:
+        Response: The updated items and the per-item errors
+    """
+    if not isinstance(data, list):
+        return Response({"detail": "Expected a list of updates."}, status=status.HTTP_400_BAD_REQUEST)
+    updated, errors = bulk_partial_update(serializer_class, data, db_name)
+    return Response({"data": serializer_class(updated, many=True).data, "errors": errors}, status=status.HTTP_200_OK)
 
 
-class MemberListCreateView(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class MemberListCreateView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     A view for listing and creating members.
     """
     serializer_class = MemberSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
+    filter_backends = [RangeFilterBackend, OrderingFilter]
+    range_filter_fields = ('membership_start', 'membership_end')
+    ordering_fields = ('created_at', 'membership_start', 'membership_end')
 
     def get_queryset(self):
         """
         Get the queryset of members.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Member.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving members.
         """
-        members = self.get_queryset()
-        return Response({"data": self.serializer_class(members, many=True).data}, status=status.HTTP_200_OK)
+        members = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(members)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        export_format = get_export_format(request)
+        if export_format is not None:
+            return stream_export(members, reader, export_format, 'members')
+
+        page = self.paginate_queryset(reader.project(members))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(members))}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         """
-        Post method for creating a new member.
+        Post method for creating a new member, or several at once from a list.
         """
-        db_name = request.query_params.get('db_name')
+        db_name = get_db_name(request)
+        if isinstance(request.data, list):
+            return bulk_create_response(self.serializer_class, request.data, db_name)
+
         serializer = self.serializer_class(data=request.data, context={'db_name': db_name})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
 
+    def patch(self, request, *args, **kwargs):
+        """
+        Patch method for updating several members at once.
+        """
+        db_name = get_db_name(request)
+        return bulk_update_response(self.serializer_class, request.data, db_name)
 
 
+class MemberSearchView(SparseFieldsMixin, generics.GenericAPIView):
+    """
+    A view for finding members by name, email or phone number.
+    """
+    serializer_class = MemberSerializer
+    permission_classes = [IsAuthenticated]
 
-class MemberRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
+    def get_queryset(self):
+        """
+        Get the queryset of members.
+        """
+        db_name = get_db_name(self.request)
+        return Member.objects.using(db_name).all()
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for searching members with ``?q=``, ranked and limited by ``?limit=``.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"q": ["This query parameter is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        except ValueError:
+            limit = SEARCH_LIMIT
+
+        members = search_members(self.filter_queryset(self.get_queryset()), query, max(limit, 1))
+        reader = self.get_reader()
+        return Response({"data": reader.represent(reader.project(members))}, status=status.HTTP_200_OK)
+
+
+class MembershipCacheStatsView(APIView):
+    """
+    A view for the hit/miss counters of the membership validity cache of this worker.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving the membership cache statistics of a gym.
+        """
+        db_name = get_db_name(request)
+        return Response({"data": memberships.stats(db_name)}, status=status.HTTP_200_OK)
+
+
+class MemberRetrieveUpdateDestroyView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
     """
     A view for retrieving, updating, and deleting a member.
     """
@@ -55,13 +180,16 @@ class MemberRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveMo
         """
         Get the queryset of members.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Member.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving member.
         """
+        not_modified = self.conditional_response(self.get_queryset().filter(pk=kwargs['pk']), use_last_modified=True)
+        if not_modified is not None:
+            return not_modified
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
@@ -69,7 +197,7 @@ class MemberRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveMo
         Update method for updating a member.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         serializer = self.serializer_class(instance, data=request.data, context={'db_name': db_name}, partial=True)
 
         if serializer.is_valid():
@@ -82,47 +210,169 @@ class MemberRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveMo
         Delete method for deleting a member.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
-        instance.delete(using=db_name)
+        db_name = get_db_name(self.request)
+        with transaction.atomic(using=db_name):
+            # Deleting a member cascades to their entries, payments and enrollments.
+            revenue.record_deleted_queryset(db_name, Payment.objects.using(db_name).filter(member=instance))
+            enrollments.release_member_seats(db_name, instance.pk)
+            instance.delete(using=db_name)
+        occupancy.invalidate(db_name)
+        memberships.invalidate(db_name, [kwargs['pk']])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
 
-class MemberEntryListCreateView(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class MemberEntryListCreateView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     A view for listing and creating member entries.
     """
     serializer_class = MemberEntrySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'entry_time'
+    filter_backends = [RangeFilterBackend, OrderingFilter]
+    range_filter_fields = ('entry_time',)
+    exact_filter_fields = ('member_id',)
+    ordering_fields = ('entry_time',)
 
     def get_queryset(self):
         """
         Get the queryset of member entries.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return MemberEntry.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving member entries.
         """
-        entries = self.get_queryset()
-        return Response({"data": self.serializer_class(entries, many=True).data}, status=status.HTTP_200_OK)
+        entries = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(entries)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        export_format = get_export_format(request)
+        if export_format is not None:
+            return stream_export(entries, reader, export_format, 'member-entries')
+
+        page = self.paginate_queryset(reader.project(entries))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(entries))}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         """
-        Post method for creating a new member entry.
+        Post method for creating a new member entry, or several at once from a list.
         """
-        db_name = request.query_params.get('db_name')
+        db_name = get_db_name(request)
+        if isinstance(request.data, list):
+            return bulk_create_response(self.serializer_class, request.data, db_name)
+
         serializer = self.serializer_class(data=request.data, context={'db_name': db_name})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, *args, **kwargs):
+        """
+        Patch method for updating several member entries at once.
+        """
+        db_name = get_db_name(request)
+        return bulk_update_response(self.serializer_class, request.data, db_name)
 
-class MemberEntryRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
+
+class MemberEntryIngestView(APIView):
+    """
+    A view for ingesting turnstile check-in/check-out events in bulk.
+    """
+    permission_classes = [IsAuthenticated]
+    wait_timeout = 10
+
+    def post(self, request, *args, **kwargs):
+        """
+        Post method for buffering one event or a list of events.
+
+        Events are acknowledged with a 202 once buffered. With ``?wait=true``
+        the response is only sent after they have been written, and lists
+        the events the database rejected; a 503 tells that they are still
+        buffered because writing them failed or took too long.
+        """
+        db_name = get_db_name(request)
+        events = request.data if isinstance(request.data, list) else [request.data]
+        serializer = CheckinEventSerializer(data=events, many=True, context={'db_name': db_name})
+        serializer.is_valid(raise_exception=True)
+
+        buffer = get_buffer(db_name)
+        ticket = buffer.add(serializer.validated_data)
+        if request.query_params.get('wait') in ('1', 'true'):
+            try:
+                buffer.flush()
+            except Exception:
+                pass
+            if not buffer.wait(ticket, timeout=self.wait_timeout):
+                return Response({"detail": "Events were buffered but could not be written yet."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            dropped = buffer.dropped(ticket - len(serializer.validated_data) + 1, ticket)
+            return Response({"accepted": len(serializer.validated_data), "errors": serializer.item_errors, "flushed": True, "dropped": dropped}, status=status.HTTP_200_OK)
+        return Response({"accepted": len(serializer.validated_data), "errors": serializer.item_errors}, status=status.HTTP_202_ACCEPTED)
+
+
+class OccupancyView(APIView):
+    """
+    A view for the live occupancy of a gym.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving the current occupancy and today's hourly breakdown.
+        """
+        db_name = get_db_name(request)
+        data = {"current": occupancy.current(db_name)}
+        if request.query_params.get('hourly', 'true') != 'false':
+            data["hourly"] = occupancy.hourly(db_name)
+        return Response({"data": data}, status=status.HTTP_200_OK)
+
+
+class MemberVisitSummaryListView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView):
+    """
+    A view for listing the daily visit summaries of archived member entries.
+    """
+    serializer_class = MemberVisitSummarySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'day'
+    filter_backends = [RangeFilterBackend, OrderingFilter]
+    range_filter_fields = ('day',)
+    exact_filter_fields = ('member_id',)
+    ordering_fields = ('day',)
+
+    def get_queryset(self):
+        """
+        Get the queryset of visit summaries.
+        """
+        db_name = get_db_name(self.request)
+        return MemberVisitSummary.objects.using(db_name).all()
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving visit summaries.
+        """
+        summaries = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(summaries)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        page = self.paginate_queryset(reader.project(summaries))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(summaries))}, status=status.HTTP_200_OK)
+
+
+class MemberEntryRetrieveUpdateDestroyView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
     """
     A view for retrieving, updating, and deleting a member entry.
     """
@@ -133,13 +383,16 @@ class MemberEntryRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retri
         """
         Get the queryset of member entries.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return MemberEntry.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving members.
         """
+        not_modified = self.conditional_response(self.get_queryset().filter(pk=kwargs['pk']), use_last_modified=True)
+        if not_modified is not None:
+            return not_modified
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
@@ -147,7 +400,7 @@ class MemberEntryRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retri
         Update method for updating a member entry.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         serializer = self.serializer_class(instance, data=request.data, context={'db_name': db_name}, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -159,46 +412,114 @@ class MemberEntryRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retri
         Delete method for deleting a member entry.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         instance.delete(using=db_name)
+        if instance.exit_time is None:
+            occupancy.adjust(db_name, -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
-class TrainerListCreateView(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class TrainerListCreateView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     A view for listing and creating trainers.
     """
     serializer_class = TrainerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
 
     def get_queryset(self):
         """
         Get the queryset of trainers.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Trainer.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving trainers.
         """
-        trainers = self.get_queryset()
-        return Response({"data": self.serializer_class(trainers, many=True).data}, status=status.HTTP_200_OK)
+        trainers = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(trainers)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        page = self.paginate_queryset(reader.project(trainers))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(trainers))}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         """
-        Post method for creating a new trainer.
+        Post method for creating a new trainer, or several at once from a list.
         """
-        db_name = request.query_params.get('db_name')
+        db_name = get_db_name(request)
+        if isinstance(request.data, list):
+            return bulk_create_response(self.serializer_class, request.data, db_name)
+
         serializer = self.serializer_class(data=request.data, context={'db_name': db_name})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, *args, **kwargs):
+        """
+        Patch method for updating several trainers at once.
+        """
+        db_name = get_db_name(request)
+        return bulk_update_response(self.serializer_class, request.data, db_name)
+
+
+class TrainerTimetableMixin:
+    """
+    View mixin loading trainers with their classes, enrollments and members in three queries.
+    """
+    serializer_class = TrainerTimetableSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Get the queryset of trainers with their timetable prefetched.
+        """
+        db_name = get_db_name(self.request)
+        roster = Enrollment.objects.using(db_name).select_related('member').order_by('created_at', 'id')
+        classes = (
+            GymClass.objects.using(db_name)
+            .order_by('start_time', 'end_time', 'id')
+            .prefetch_related(Prefetch('enrollments', queryset=roster))
+        )
+        return Trainer.objects.using(db_name).order_by('name', 'id').prefetch_related(Prefetch('gymclass_set', queryset=classes))
+
+
+class TrainerTimetableListView(TrainerTimetableMixin, generics.GenericAPIView):
+    """
+    A view for retrieving the timetable of every trainer.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving all trainers with their classes and enrolled members.
+        """
+        trainers = self.get_queryset()
+        return Response({"data": self.get_serializer(trainers, many=True).data}, status=status.HTTP_200_OK)
+
+
+class TrainerTimetableView(TrainerTimetableMixin, generics.GenericAPIView):
+    """
+    A view for retrieving the timetable of a trainer.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving a trainer with their classes and enrolled members.
+        """
+        return Response({"data": self.get_serializer(self.get_object()).data}, status=status.HTTP_200_OK)
 
-class TrainerRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
+
+class TrainerRetrieveUpdateDestroyView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
     """
     A view for retrieving, updating, and deleting a trainer.
     """
@@ -209,13 +530,16 @@ class TrainerRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         """
         Get the queryset of trainers.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Trainer.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving members.
         """
+        not_modified = self.conditional_response(self.get_queryset().filter(pk=kwargs['pk']), use_last_modified=True)
+        if not_modified is not None:
+            return not_modified
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
@@ -223,7 +547,7 @@ class TrainerRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         Update method for updating a trainer.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         serializer = self.serializer_class(instance, data=request.data, context={'db_name': db_name}, partial=True)
 
         if serializer.is_valid():
@@ -236,46 +560,88 @@ class TrainerRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         Delete method for deleting a trainer.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         instance.delete(using=db_name)
+        schedules.invalidate(db_name, [kwargs['pk']])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
-class GymClassListCreateView(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class GymClassListCreateView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     A view for listing and creating gym classes.
     """
     serializer_class = GymClassSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
 
     def get_queryset(self):
         """
         Get the queryset of gym classes.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return GymClass.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving gym classes.
         """
-        gym_classes = self.get_queryset()
-        return Response({"data": self.serializer_class(gym_classes, many=True).data}, status=status.HTTP_200_OK)
+        gym_classes = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(gym_classes)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        page = self.paginate_queryset(reader.project(gym_classes))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(gym_classes))}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         """
-        Post method for creating a new gym class.
+        Post method for creating a new gym class, or several at once from a list.
         """
-        db_name = request.query_params.get('db_name')
+        db_name = get_db_name(request)
+        if isinstance(request.data, list):
+            return bulk_create_response(self.serializer_class, request.data, db_name)
+
         serializer = self.serializer_class(data=request.data, context={'db_name': db_name})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, *args, **kwargs):
+        """
+        Patch method for updating several gym classes at once.
+        """
+        db_name = get_db_name(request)
+        return bulk_update_response(self.serializer_class, request.data, db_name)
+
 
-class GymClassRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
+class GymClassConflictsView(APIView):
+    """
+    A view for reporting the overlapping classes of every trainer.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving every pair of overlapping classes, optionally for one ``trainer_id``.
+        """
+        db_name = get_db_name(request)
+        classes = GymClass.objects.using(db_name).all()
+        trainer_id = request.query_params.get('trainer_id')
+        if trainer_id:
+            if not trainer_id.isdigit():
+                return Response({"trainer_id": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+            classes = classes.filter(trainer_id=trainer_id)
+        rows = classes.values_list('trainer_id', 'id', 'name', 'start_time', 'end_time')
+        return Response({"data": schedules.find_overlaps(rows)}, status=status.HTTP_200_OK)
+
+
+class GymClassRetrieveUpdateDestroyView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
     """
     A view for retrieving, updating, and deleting a gym class.
     """
@@ -286,13 +652,16 @@ class GymClassRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retrieve
         """
         Get the queryset of gym classes.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return GymClass.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving a gym class.
         """
+        not_modified = self.conditional_response(self.get_queryset().filter(pk=kwargs['pk']), use_last_modified=True)
+        if not_modified is not None:
+            return not_modified
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
@@ -300,7 +669,7 @@ class GymClassRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retrieve
         Update method for updating a gym class.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         serializer = self.serializer_class(instance, data=request.data, context={'db_name': db_name}, partial=True)
 
         if serializer.is_valid():
@@ -313,46 +682,184 @@ class GymClassRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.Retrieve
         Delete method for deleting a gym class.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         instance.delete(using=db_name)
+        schedules.invalidate(db_name, [instance.trainer_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
-class PaymentListCreateView(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class GymClassRosterView(generics.GenericAPIView):
+    """
+    A view for retrieving a class with its trainer and enrolled members.
+    """
+    serializer_class = GymClassRosterSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Get the queryset of classes with their trainer and roster, in two queries.
+        """
+        db_name = get_db_name(self.request)
+        roster = Enrollment.objects.using(db_name).select_related('member').order_by('created_at', 'id')
+        return GymClass.objects.using(db_name).select_related('trainer').prefetch_related(Prefetch('enrollments', queryset=roster))
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving the roster of a class.
+        """
+        return Response({"data": self.get_serializer(self.get_object()).data}, status=status.HTTP_200_OK)
+
+
+class EnrollmentCreateView(APIView):
+    """
+    A view for enrolling members in a class.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk, *args, **kwargs):
+        """
+        Post method for enrolling a member, answering 409 when the class is full or the member already attends.
+        """
+        db_name = get_db_name(request)
+        serializer = EnrollmentSerializer(data=request.data, context={'db_name': db_name})
+        serializer.is_valid(raise_exception=True)
+        enrollment = enrollments.enroll(db_name, pk, serializer.validated_data['member_id'])
+        return Response(EnrollmentSerializer(enrollment).data, status=status.HTTP_201_CREATED)
+
+
+class EnrollmentDestroyView(APIView):
+    """
+    A view for removing a member from a class.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, pk, member_id, *args, **kwargs):
+        """
+        Delete method for unenrolling a member and freeing their seat.
+        """
+        db_name = get_db_name(request)
+        if not enrollments.unenroll(db_name, pk, member_id):
+            return Response({"detail": "The member is not enrolled in this class."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PaymentListCreateView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
     """
     A view for listing and creating payments.
     """
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_field = 'created_at'
+    filter_backends = [RangeFilterBackend, OrderingFilter]
+    range_filter_fields = ('payment_date',)
+    exact_filter_fields = ('payment_method', 'member_id')
+    ordering_fields = ('created_at', 'payment_date')
 
     def get_queryset(self):
         """
         Get the queryset of payments.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Payment.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving payments.
         """
-        payments = self.get_queryset()
-        return Response({"data": self.serializer_class(payments, many=True).data}, status=status.HTTP_200_OK)
+        payments = self.filter_queryset(self.get_queryset())
+        not_modified = self.conditional_response(payments)
+        if not_modified is not None:
+            return not_modified
+
+        reader = self.get_reader()
+        export_format = get_export_format(request)
+        if export_format is not None:
+            return stream_export(payments, reader, export_format, 'payments')
+
+        page = self.paginate_queryset(reader.project(payments))
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response({"data": reader.represent(reader.project(payments))}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         """
-        Post method for creating a new payment.
+        Post method for creating a new payment, or several at once from a list.
         """
-        db_name = request.query_params.get('db_name')
+        db_name = get_db_name(request)
+        if isinstance(request.data, list):
+            return bulk_create_response(self.serializer_class, request.data, db_name)
+
         serializer = self.serializer_class(data=request.data, context={'db_name': db_name})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, *args, **kwargs):
+        """
+        Patch method for updating several payments at once.
+        """
+        db_name = get_db_name(request)
+        return bulk_update_response(self.serializer_class, request.data, db_name)
+
+
+class PaymentSummaryView(ConditionalGetMixin, APIView):
+    """
+    A view for revenue totals per day, week or month, read from the daily revenue rollup.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving the revenue summary between ``from`` and ``to`` (inclusive).
+        """
+        db_name = get_db_name(request)
+        group = request.query_params.get('group', revenue.GROUP_DAY)
+        if group not in revenue.GROUPS:
+            return Response({"group": [f'Expected one of: {", ".join(revenue.GROUPS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = DailyRevenue.objects.using(db_name).all()
+        for param, lookup in (('from', 'day__gte'), ('to', 'day__lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                day = parse_date(value)
+            except ValueError:
+                day = None
+            if day is None:
+                return Response({param: ['Expected a date in YYYY-MM-DD format.']}, status=status.HTTP_400_BAD_REQUEST)
+            rollups = rollups.filter(**{lookup: day})
+
+        not_modified = self.conditional_response(rollups)
+        if not_modified is not None:
+            return not_modified
+        return Response({"data": revenue.summarize(rollups, group)}, status=status.HTTP_200_OK)
+
+
+class ForecastView(APIView):
+    """
+    A view for the renewal and expected revenue forecast of a gym.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get method for retrieving the forecast of the next ``days`` days (90 by default).
+        """
+        db_name = get_db_name(request)
+        try:
+            days = int(request.query_params.get('days', FORECAST_DAYS))
+        except ValueError:
+            days = 0
+        if not 0 < days <= MAX_FORECAST_DAYS:
+            return Response({"days": [f'Expected a number of days between 1 and {MAX_FORECAST_DAYS}.']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"data": forecast(db_name, days)}, status=status.HTTP_200_OK)
+
 
-class PaymentRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
+class PaymentRetrieveUpdateDestroyView(ConditionalGetMixin, SparseFieldsMixin, generics.GenericAPIView, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin):
     """
     A view for retrieving, updating, and deleting a payment.
     """
@@ -363,13 +870,16 @@ class PaymentRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         """
         Get the queryset of payments.
         """
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         return Payment.objects.using(db_name).all()
 
     def get(self, request, *args, **kwargs):
         """
         Get method for retrieving a payment.
         """
+        not_modified = self.conditional_response(self.get_queryset().filter(pk=kwargs['pk']), use_last_modified=True)
+        if not_modified is not None:
+            return not_modified
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
@@ -377,7 +887,7 @@ class PaymentRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         Update method for updating a payment.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
+        db_name = get_db_name(self.request)
         serializer = self.serializer_class(instance, data=request.data, context={'db_name': db_name}, partial=True)
 
         if serializer.is_valid():
@@ -390,6 +900,38 @@ class PaymentRetrieveUpdateDestroyView(generics.GenericAPIView, mixins.RetrieveM
         Delete method for deleting a payment.
         """
         instance = self.get_object()
-        db_name = self.request.query_params.get('db_name')
-        instance.delete(using=db_name)
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        db_name = get_db_name(self.request)
+        with transaction.atomic(using=db_name):
+            instance.delete(using=db_name)
+            revenue.record_deleted(db_name, [instance])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CSVImportView(APIView):
+    """
+    A view for importing members or payments from an uploaded CSV file.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, resource, *args, **kwargs):
+        """
+        Post method for importing the rows of the ``file`` upload.
+
+        Valid rows are imported and the rejected ones are reported with their
+        line number and errors.
+        """
+        db_name = get_db_name(request)
+        if resource not in IMPORT_SERIALIZERS:
+            return Response({"detail": f'Unknown resource "{resource}".'}, status=status.HTTP_404_NOT_FOUND)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = []
+        file = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_csv(db_name, resource, file, on_error=lambda line, row, row_errors: errors.append({"line": line, "errors": row_errors}))
+        except UnicodeDecodeError:
+            return Response({"file": ["Expected a UTF-8 encoded CSV file."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({**result, "errors": errors}, status=status.HTTP_201_CREATED if result['imported'] else status.HTTP_400_BAD_REQUEST)